@@ -0,0 +1,123 @@
+"""Benchmark transcript formatting: single-pass cleaner vs. the original.
+
+Run from the repository root:
+
+    python -m benchmarks.clean_text
+"""
+
+import argparse
+import random
+import re
+import time
+from datetime import datetime
+
+from config import EST
+from summarizer import ConversationSummarizer, format_timestamp
+
+
+class LegacyFormatter:
+    """The multi-pass `_clean_text` and per-message datetime formatting it replaced."""
+
+    def __init__(self, user_map):
+        self.user_map = user_map
+
+    def clean_text(self, text):
+        text = re.sub(r"<@(U[A-Z0-9]+)>", r"@\1", text)
+        text = re.sub(r"<#C[A-Z0-9]+\|([^>]+)>", r"#\1", text)
+        text = re.sub(r"<![a-zA-Z]+>", "", text)
+        for user_id in re.findall(r"@(U[A-Z0-9]+)", text):
+            if user_id in self.user_map:
+                text = text.replace(f"@{user_id}", f"@{self.user_map[user_id]}")
+        return text.strip()
+
+    def format_timestamp(self, timestamp):
+        timestamp_dt = datetime.fromtimestamp(float(timestamp), EST)
+        return timestamp_dt.strftime("%m/%d/%Y %H:%M")
+
+    def format(self, messages):
+        lines = []
+        for msg in messages:
+            lines.append(
+                f"[{self.format_timestamp(msg['timestamp'])}] **{msg['user']}**: "
+                f"{self.clean_text(msg['text'])}"
+            )
+            for reply in msg.get("thread_replies", []):
+                lines.append(
+                    f"    [{self.format_timestamp(reply['timestamp'])}] "
+                    f"**{reply['user']}** (reply): {self.clean_text(reply['text'])}"
+                )
+        return lines
+
+
+def format_current(summarizer, messages):
+    lines = []
+    for msg in messages:
+        lines.append(
+            f"[{format_timestamp(msg['timestamp'])}] **{msg['user']}**: "
+            f"{summarizer._clean_text(msg['text'])}"
+        )
+        for reply in msg.get("thread_replies", []):
+            lines.append(
+                f"    [{format_timestamp(reply['timestamp'])}] "
+                f"**{reply['user']}** (reply): {summarizer._clean_text(reply['text'])}"
+            )
+    return lines
+
+
+def build_transcript(num_messages, num_users=200, seed=7):
+    rng = random.Random(seed)
+    user_ids = [f"U{i:08d}" for i in range(num_users)]
+    user_map = {user_id: f"user{i}" for i, user_id in enumerate(user_ids)}
+    words = "deal pipeline demo pricing renewal contract follow up call notes".split()
+    base_ts = 1_700_000_000.0
+
+    def text():
+        parts = rng.choices(words, k=12)
+        parts.insert(rng.randrange(12), f"<@{rng.choice(user_ids)}>")
+        if rng.random() < 0.3:
+            parts.insert(rng.randrange(12), "<#C12345678|sales-team>")
+        if rng.random() < 0.1:
+            parts.insert(0, "<!here>")
+        return " ".join(parts)
+
+    messages = []
+    for i in range(num_messages):
+        ts = base_ts + i * 7
+        msg = {"timestamp": f"{ts:.6f}", "user": f"user{i % num_users}", "text": text()}
+        if i % 10 == 0:
+            msg["thread_replies"] = [
+                {
+                    "timestamp": f"{ts + r + 1:.6f}",
+                    "user": f"user{(i + r) % num_users}",
+                    "text": text(),
+                }
+                for r in range(3)
+            ]
+        messages.append(msg)
+    return user_map, messages
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--messages", type=int, default=50_000)
+    args = parser.parse_args()
+
+    user_map, messages = build_transcript(args.messages)
+
+    start = time.perf_counter()
+    legacy = LegacyFormatter(user_map).format(messages)
+    legacy_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    current = format_current(ConversationSummarizer(user_map), messages)
+    current_seconds = time.perf_counter() - start
+
+    assert legacy == current, "single-pass cleaner output differs from the original"
+    print(f"messages={args.messages} (+{len(legacy) - args.messages} replies)")
+    print(f"original:    {legacy_seconds:.2f}s")
+    print(f"single-pass: {current_seconds:.2f}s")
+    print(f"speedup:     {legacy_seconds / current_seconds:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,348 @@
+"""Benchmark the full summarization pipeline against local API stand-ins.
+
+Slack, Notion and OpenAI are replaced by the fakes in `benchmarks.fakes`, so
+the run needs no tokens or network. For each workspace size the pipeline
+stages are run one after another to record wall time, API calls and peak
+memory per stage, then `main.main()` is run end to end in a fresh working
+directory. Run from the repository root:
+
+    python -m benchmarks.end_to_end --sizes small medium
+
+Pass ``--output results.json`` to save a baseline and ``--baseline
+results.json`` on a later run to fail when a stage got slower or made more
+API calls.
+"""
+
+import argparse
+import json
+import logging
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+from collections import Counter
+from contextlib import contextmanager
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Dict, List
+
+import clients
+import config
+import main as agent_main
+import notion_fetcher
+import slack_client
+import summarizer
+from benchmarks.fakes import (
+    FakeNotionClient,
+    FakeOpenAI,
+    FakeSlackClient,
+)
+from instrumentation import metrics
+from message_store import MessageStore
+from rate_limiter import rate_limiter
+from step_index import StepIndex
+
+SUMMARY_CHANNEL = "slack-summarization-agent"
+
+
+@dataclass
+class Workspace:
+    """Size of a synthetic Slack channel and Notion workspace."""
+
+    messages: int
+    threads: int
+    replies_per_thread: int
+    steps: int
+    processes: int
+    sops: int
+    blocks_per_page: int
+
+
+WORKSPACES = {
+    "small": Workspace(200, 20, 5, 20, 5, 20, 10),
+    "medium": Workspace(2000, 200, 5, 100, 10, 100, 20),
+    "large": Workspace(10000, 1000, 10, 300, 20, 300, 40),
+}
+
+
+@contextmanager
+def offline_clients(workspace: Workspace, args: argparse.Namespace):
+    """Point the Slack, Notion and OpenAI clients at fakes for `workspace`."""
+    fake_slack = FakeSlackClient(
+        num_messages=workspace.messages,
+        num_threads=workspace.threads,
+        replies_per_thread=workspace.replies_per_thread,
+        latency=args.slack_latency,
+        # One message per second, ending a minute ago, inside HOURS_DELTA
+        base_ts=time.time() - workspace.messages - 60,
+        rate_limit=args.rate_limit,
+    )
+    fake_slack.channels.append({"id": "C000002", "name": SUMMARY_CHANNEL})
+    fake_notion = FakeNotionClient(
+        num_steps=workspace.steps,
+        num_processes=workspace.processes,
+        num_sops=workspace.sops,
+        blocks_per_page=workspace.blocks_per_page,
+        latency=args.notion_latency,
+        rate_limit=args.rate_limit,
+    )
+    fake_openai = FakeOpenAI(
+        latency=args.openai_latency, rate_limit=args.openai_rate_limit
+    )
+
+    patched = [
+        (clients, "slack_web_client", lambda: fake_slack),
+        (clients, "notion_api_client", lambda: fake_notion),
+        (clients, "openai_client", lambda: fake_openai),
+        (config, "NOTION_STEPS_DATABASE_ID", FakeNotionClient.STEPS_DB),
+        (config, "NOTION_PROCESSES_DATABASE_ID", FakeNotionClient.PROCESSES_DB),
+        (config, "NOTION_SOP_DATABASE_ID", FakeNotionClient.SOPS_DB),
+        (config, "SEND_TO_TEST_CHANNEL", False),
+        (config, "STREAM_SUMMARIES", args.stream),
+    ]
+    originals = [(module, name, getattr(module, name)) for module, name, _ in patched]
+    for module, name, value in patched:
+        setattr(module, name, value)
+    try:
+        yield fake_slack, fake_notion, fake_openai
+    finally:
+        for module, name, value in originals:
+            setattr(module, name, value)
+
+
+@contextmanager
+def working_directory():
+    """Run in a fresh temporary directory so `.cache/` and `outputs/` start cold."""
+    previous = os.getcwd()
+    with tempfile.TemporaryDirectory(prefix="summarizer-bench-") as path:
+        os.chdir(path)
+        os.makedirs("outputs")
+        try:
+            yield path
+        finally:
+            os.chdir(previous)
+
+
+@contextmanager
+def measure(name: str, results: Dict):
+    """Record wall time, API calls and peak traced memory of a block."""
+    calls_before = Counter(metrics.api_calls)
+    tracemalloc.reset_peak()
+    memory_before = tracemalloc.get_traced_memory()[0]
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - start
+        peak = tracemalloc.get_traced_memory()[1]
+        calls = Counter(metrics.api_calls)
+        calls.subtract(calls_before)
+        results[name] = {
+            "wall_seconds": round(elapsed, 3),
+            "api_calls": {endpoint: n for endpoint, n in calls.items() if n},
+            "peak_memory_mb": round((peak - memory_before) / 2**20, 2),
+        }
+
+
+def run_stages(results: Dict) -> Dict:
+    """Run the stages of `main.main()` in sequence, measuring each one.
+
+    What was fetched is counted in `results`, so data dropped on errors such
+    as rate limiting shows up.
+    """
+    stages = {}
+    start_date = (datetime.now() - timedelta(hours=24)).strftime("%m/%d %H:%M")
+    end_date = datetime.now().strftime("%m/%d %H:%M")
+
+    with measure("slack.fetch", stages):
+        slack_fetcher = slack_client.SlackDataFetcher(store=MessageStore())
+        conversations = slack_fetcher.organize_conversations(config.SUMMARY_CHANNELS)
+
+    with measure("notion.fetch", stages):
+        steps = notion_fetcher.NotionDataFetcher().fetch_steps()
+        step_index = StepIndex(steps)
+
+    messages = [msg for msgs in conversations.values() for msg in msgs]
+    results["fetched"] = {
+        "messages": len(messages),
+        "replies": sum(len(msg.thread_replies) for msg in messages),
+        "steps": len(steps),
+        "bodies": sum(
+            1
+            for step in steps
+            for page in step["processes"] + step["sops"]
+            if page["body_content"]
+        ),
+    }
+
+    conversation_summarizer = summarizer.ConversationSummarizer(slack_fetcher.user_map)
+    summaries = {}
+    with measure("summarize", stages):
+        for channel_name, messages in conversations.items():
+            summaries[channel_name] = agent_main.summarize_channel(
+                conversation_summarizer, channel_name, messages, start_date, end_date
+            )
+
+    with measure("link", stages):
+        for channel_name, channel_summary in summaries.items():
+            summaries[channel_name] = agent_main.link_channel(
+                conversation_summarizer, channel_name, channel_summary, step_index
+            )
+
+    with measure("slack.send", stages):
+        for channel_summary in summaries.values():
+            slack_fetcher.send_message_to_channel(SUMMARY_CHANNEL, channel_summary)
+
+    return stages
+
+
+def run_main(results: Dict, name: str) -> None:
+    """Run `main.main()` and add its totals and per-stage timings to `results`."""
+    with measure(name, results):
+        agent_main.main()
+    # main() resets the shared metrics, so take its calls from the run report
+    report = metrics.report()
+    results[name]["api_calls"] = report["api_calls"]
+    results[name]["stages"] = {
+        stage: timings["total_seconds"] for stage, timings in report["stages"].items()
+    }
+    results[name]["token_usage"] = report["token_usage"]
+    results[name]["throttled_seconds"] = report["throttled_seconds"]
+    results[name]["critical_path"] = report["critical_path"]
+
+
+def run_workspace(size: str, args: argparse.Namespace) -> Dict:
+    workspace = WORKSPACES[size]
+    results = {}
+    # Start every workspace without rates learned from the previous one
+    rate_limiter.reset()
+    with offline_clients(workspace, args) as fakes:
+        with working_directory():
+            metrics.reset()
+            results["stages"] = run_stages(results)
+        with working_directory():
+            run_main(results, "end_to_end")
+            if args.warm:
+                run_main(results, "end_to_end_warm")
+    results["rate_limited"] = {
+        name: dict(fake.rate_limited)
+        for name, fake in zip(("slack", "notion", "openai"), fakes)
+        if fake.rate_limited
+    }
+    return results
+
+
+def print_results(size: str, results: Dict) -> None:
+    rows = _rows(results)
+    print(f"\n{size} workspace: {WORKSPACES[size]}")
+    print(f"{'stage':<18} {'wall':>9} {'api calls':>10} {'peak memory':>12}")
+    for name, row in rows.items():
+        print(
+            f"{name:<18} {row['wall_seconds']:>8.2f}s "
+            f"{sum(row['api_calls'].values()):>10} "
+            f"{row['peak_memory_mb']:>9.2f} MB"
+        )
+    print(f"fetched: {results['fetched']}")
+    throttled = results["end_to_end"].get("throttled_seconds")
+    if throttled:
+        print(f"throttled: {throttled}")
+    if results["rate_limited"]:
+        print(f"rate limited: {results['rate_limited']}")
+
+
+def compare(results: Dict, baseline: Dict, max_regression: float) -> List[str]:
+    """Return the stages that are slower or make more API calls than `baseline`."""
+    regressions = []
+    for size, size_results in results.items():
+        for name, row in _rows(size_results).items():
+            previous = _rows(baseline.get(size, {})).get(name)
+            if not previous:
+                continue
+            calls = sum(row["api_calls"].values())
+            previous_calls = sum(previous["api_calls"].values())
+            if calls > previous_calls:
+                regressions.append(
+                    f"{size}/{name}: {calls} API calls (baseline {previous_calls})"
+                )
+            limit = previous["wall_seconds"] * (1 + max_regression)
+            if row["wall_seconds"] > limit:
+                regressions.append(
+                    f"{size}/{name}: {row['wall_seconds']:.2f}s "
+                    f"(baseline {previous['wall_seconds']:.2f}s)"
+                )
+    return regressions
+
+
+def _rows(size_results: Dict) -> Dict:
+    rows = dict(size_results.get("stages", {}))
+    for name in ("end_to_end", "end_to_end_warm"):
+        if name in size_results:
+            rows[name] = size_results[name]
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "--sizes", nargs="+", choices=WORKSPACES, default=["small", "medium"]
+    )
+    parser.add_argument("--slack-latency", type=float, default=0.02)
+    parser.add_argument("--notion-latency", type=float, default=0.02)
+    parser.add_argument("--openai-latency", type=float, default=0.2)
+    parser.add_argument(
+        "--rate-limit",
+        type=float,
+        default=None,
+        help="Slack and Notion calls allowed per second and method",
+    )
+    parser.add_argument(
+        "--openai-rate-limit",
+        type=float,
+        default=None,
+        help="OpenAI requests allowed per second",
+    )
+    parser.add_argument(
+        "--stream",
+        action="store_true",
+        help="stream summaries into Slack with placeholder updates",
+    )
+    parser.add_argument(
+        "--warm", action="store_true", help="also rerun main() with warm caches"
+    )
+    parser.add_argument("--output", help="write the results as JSON to this path")
+    parser.add_argument("--baseline", help="JSON results of an earlier run to compare")
+    parser.add_argument(
+        "--max-regression",
+        type=float,
+        default=0.25,
+        help="allowed relative wall-time increase over the baseline",
+    )
+    args = parser.parse_args()
+
+    logging.getLogger().setLevel(logging.WARNING)
+    tracemalloc.start()
+    results = {}
+    for size in args.sizes:
+        results[size] = run_workspace(size, args)
+        print_results(size, results[size])
+    tracemalloc.stop()
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+        print(f"\nResults written to {args.output}")
+
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            regressions = compare(results, json.load(f), args.max_regression)
+        if regressions:
+            print("\nRegressions against baseline:")
+            for regression in regressions:
+                print(f"  {regression}")
+            sys.exit(1)
+        print("\nNo regressions against baseline")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,476 @@
+"""Local stand-ins for the external API clients used by the benchmarks."""
+
+import math
+import re
+import threading
+import time
+from collections import Counter, defaultdict, deque
+from types import SimpleNamespace
+from typing import Dict, List, Optional
+
+import httpx
+from notion_client.errors import APIErrorCode, APIResponseError
+from openai import RateLimitError
+from slack_sdk.errors import SlackApiError
+from slack_sdk.web import SlackResponse
+
+from tokens import estimate_tokens
+
+
+class RateLimit:
+    """Per-method sliding-window limit of ``calls_per_second`` calls.
+
+    `check` returns ``None`` when a call is allowed, otherwise the number of
+    seconds until the oldest call in the window expires (the Retry-After).
+    """
+
+    def __init__(self, calls_per_second: float):
+        self.calls_per_second = calls_per_second
+        self._recent = defaultdict(deque)
+
+    def check(self, method: str) -> Optional[float]:
+        now = time.monotonic()
+        recent = self._recent[method]
+        while recent and now - recent[0] >= 1:
+            recent.popleft()
+        if len(recent) >= self.calls_per_second:
+            return 1 - (now - recent[0])
+        recent.append(now)
+        return None
+
+
+def _rate_limit(calls_per_second: Optional[float]) -> Optional[RateLimit]:
+    return RateLimit(calls_per_second) if calls_per_second else None
+
+
+class FakeSlackClient:
+    """Minimal `WebClient` replacement that serves a synthetic channel.
+
+    Every API method sleeps for ``latency`` seconds before answering so that
+    the cost of sequential round-trips is visible in wall-clock time. With
+    ``rate_limit`` set, calls beyond that many per second and method fail with
+    a 429 `SlackApiError`, like Slack's per-method tiers.
+    """
+
+    def __init__(
+        self,
+        num_messages: int = 100,
+        num_threads: int = 10,
+        replies_per_thread: int = 5,
+        latency: float = 0.05,
+        base_ts: float = None,
+        rate_limit: Optional[float] = None,
+    ):
+        self.latency = latency
+        self.calls = Counter()
+        self.rate_limited = Counter()
+        self.rate_limit = _rate_limit(rate_limit)
+        self._lock = threading.Lock()
+        self.base_ts = base_ts if base_ts is not None else time.time() - 3600
+        self.users = [
+            {"id": f"U{i:06d}", "profile": {"display_name": f"user{i}"}}
+            for i in range(20)
+        ]
+        self.channels = [{"id": "C000001", "name": "sales-team"}]
+        self.replies_per_thread = replies_per_thread
+        self.messages = self._build_messages(num_messages, num_threads)
+
+    def _build_messages(self, num_messages: int, num_threads: int) -> List[Dict]:
+        messages = []
+        for i in range(num_messages):
+            ts = f"{self.base_ts + i:.6f}"
+            message = {
+                "ts": ts,
+                "user": self.users[i % len(self.users)]["id"],
+                "text": f"Message {i} for <@{self.users[(i + 1) % len(self.users)]['id']}>",
+            }
+            if i < num_threads:
+                message["thread_ts"] = ts
+                if self.replies_per_thread:
+                    message["reply_count"] = self.replies_per_thread
+                    message["latest_reply"] = self._reply_ts(
+                        ts, self.replies_per_thread - 1
+                    )
+            messages.append(message)
+        # Slack returns history newest first
+        return list(reversed(messages))
+
+    @staticmethod
+    def _reply_ts(thread_ts: str, n: int) -> str:
+        return f"{float(thread_ts) + (n + 1) / 1000:.6f}"
+
+    def _call(self, method: str) -> None:
+        with self._lock:
+            self.calls[method] += 1
+            retry_after = self.rate_limit and self.rate_limit.check(method)
+            if retry_after:
+                self.rate_limited[method] += 1
+        time.sleep(self.latency)
+        if retry_after:
+            response = SlackResponse(
+                client=self,
+                http_verb="POST",
+                api_url=f"https://slack.com/api/{method}",
+                req_args={},
+                data={"ok": False, "error": "ratelimited"},
+                headers={"Retry-After": str(math.ceil(retry_after))},
+                status_code=429,
+            )
+            raise SlackApiError("The request was rate limited", response)
+
+    @staticmethod
+    def _page(key: str, items: List, limit: int = None, cursor: str = None) -> Dict:
+        """Slice `items` like a cursor-paginated Slack response."""
+        offset = int(cursor) if cursor else 0
+        limit = limit or len(items) or 1
+        page = items[offset : offset + limit]
+        next_offset = offset + limit
+        next_cursor = str(next_offset) if next_offset < len(items) else ""
+        return {
+            "ok": True,
+            key: page,
+            "response_metadata": {"next_cursor": next_cursor},
+        }
+
+    def users_list(self, limit: int = None, cursor: str = None, **kwargs) -> Dict:
+        self._call("users.list")
+        return self._page("members", self.users, limit, cursor)
+
+    def users_info(self, user: str, **kwargs) -> Dict:
+        self._call("users.info")
+        for member in self.users:
+            if member["id"] == user:
+                return {"ok": True, "user": member}
+        return {"ok": True, "user": {"id": user, "profile": {}}}
+
+    def conversations_list(
+        self, limit: int = None, cursor: str = None, **kwargs
+    ) -> Dict:
+        self._call("conversations.list")
+        return self._page("channels", self.channels, limit, cursor)
+
+    def conversations_history(
+        self, channel: str, limit: int = None, cursor: str = None, **kwargs
+    ) -> Dict:
+        self._call("conversations.history")
+        oldest = float(kwargs.get("oldest") or 0)
+        latest = float(kwargs.get("latest") or "inf")
+        messages = [m for m in self.messages if oldest < float(m["ts"]) <= latest]
+        return self._page("messages", messages, limit, cursor)
+
+    def conversations_replies(self, channel: str, ts: str, **kwargs) -> Dict:
+        self._call("conversations.replies")
+        parent = {
+            "ts": ts,
+            "thread_ts": ts,
+            "user": self.users[0]["id"],
+            "text": "parent",
+        }
+        replies = [
+            {
+                "ts": self._reply_ts(ts, n),
+                "thread_ts": ts,
+                "user": self.users[n % len(self.users)]["id"],
+                "text": f"Reply {n} in {ts}",
+            }
+            for n in range(self.replies_per_thread)
+        ]
+        return {"ok": True, "messages": [parent] + replies}
+
+    def chat_postMessage(self, channel: str, text: str, **kwargs) -> Dict:
+        self._call("chat.postMessage")
+        return {"ok": True, "channel": channel, "ts": f"{time.time():.6f}"}
+
+    def chat_update(self, channel: str, ts: str, text: str, **kwargs) -> Dict:
+        self._call("chat.update")
+        return {"ok": True, "channel": channel, "ts": ts, "text": text}
+
+
+class _Namespace:
+    pass
+
+
+class FakeNotionClient:
+    """Minimal `notion_client.Client` replacement serving synthetic databases.
+
+    Steps, Processes and SOPs are linked through the same relation properties
+    as the real workspace ("Steps" and "Associated Steps"). Every page body is
+    a list of paragraph blocks, optionally with nested toggles. With
+    ``rate_limit`` set, calls beyond that many per second and method fail with
+    a ``rate_limited`` `APIResponseError`.
+    """
+
+    STEPS_DB = "steps-db"
+    PROCESSES_DB = "processes-db"
+    SOPS_DB = "sops-db"
+
+    def __init__(
+        self,
+        num_steps: int = 20,
+        num_processes: int = 5,
+        num_sops: int = 20,
+        blocks_per_page: int = 10,
+        latency: float = 0.0,
+        page_size: int = 100,
+        nesting_depth: int = 0,
+        rate_limit: Optional[float] = None,
+    ):
+        self.latency = latency
+        self.page_size = page_size
+        self.calls = Counter()
+        self.rate_limited = Counter()
+        self.rate_limit = _rate_limit(rate_limit)
+        self._lock = threading.Lock()
+
+        steps = [self._page(f"step-{i}", f"{i}. Step {i}") for i in range(num_steps)]
+        processes = [
+            self._page(f"process-{i}", f"Process {i}") for i in range(num_processes)
+        ]
+        sops = [self._page(f"sop-{i}", f"How to do step {i}") for i in range(num_sops)]
+        for i, step in enumerate(steps):
+            step["properties"]["Process"] = {"relation": []}
+            if processes:
+                process = processes[i % len(processes)]
+                process["properties"]["Steps"]["relation"].append({"id": step["id"]})
+            if sops:
+                sop = sops[i % len(sops)]
+                sop["properties"]["Associated Steps"]["relation"].append(
+                    {"id": step["id"]}
+                )
+        self.databases_by_id = {
+            self.STEPS_DB: steps,
+            self.PROCESSES_DB: processes,
+            self.SOPS_DB: sops,
+        }
+        self.blocks_by_parent = {}
+        for page in processes + sops:
+            self._add_blocks(page["id"], blocks_per_page, nesting_depth)
+
+        self.databases = _Namespace()
+        self.databases.query = self._databases_query
+        self.blocks = _Namespace()
+        self.blocks.children = _Namespace()
+        self.blocks.children.list = self._blocks_children_list
+        self.pages = _Namespace()
+        self.pages.properties = _Namespace()
+        self.pages.properties.retrieve = self._pages_properties_retrieve
+
+    def _add_blocks(self, parent_id: str, count: int, depth: int) -> None:
+        """Give `parent_id` `count` paragraphs, nesting a toggle `depth` levels deep."""
+        blocks = [
+            {
+                "id": f"{parent_id}-block-{n}",
+                "type": "paragraph",
+                "has_children": False,
+                "paragraph": {
+                    "rich_text": [
+                        {
+                            "type": "text",
+                            "text": {"content": f"Line {n} of {parent_id}"},
+                        }
+                    ]
+                },
+            }
+            for n in range(count)
+        ]
+        for n in range(depth and count):
+            toggle_id = f"{parent_id}-toggle-{n}"
+            blocks.append(
+                {
+                    "id": toggle_id,
+                    "type": "toggle",
+                    "has_children": True,
+                    "toggle": {
+                        "rich_text": [{"type": "text", "text": {"content": toggle_id}}]
+                    },
+                }
+            )
+            self._add_blocks(toggle_id, count, depth - 1)
+        self.blocks_by_parent[parent_id] = blocks
+
+    @staticmethod
+    def _page(page_id: str, name: str) -> Dict:
+        return {
+            "id": page_id,
+            "last_edited_time": "2024-01-01T00:00:00.000Z",
+            "properties": {
+                "Name": {"title": [{"text": {"content": name}}]},
+                "Steps": {"id": "steps", "relation": []},
+                "Associated Steps": {"id": "assoc", "relation": []},
+            },
+        }
+
+    def _call(self, method: str) -> None:
+        with self._lock:
+            self.calls[method] += 1
+            retry_after = self.rate_limit and self.rate_limit.check(method)
+            if retry_after:
+                self.rate_limited[method] += 1
+        time.sleep(self.latency)
+        if retry_after:
+            response = httpx.Response(
+                429,
+                headers={"Retry-After": str(math.ceil(retry_after))},
+                request=httpx.Request("POST", f"https://api.notion.com/v1/{method}"),
+            )
+            raise APIResponseError(response, "Rate limited", APIErrorCode.RateLimited)
+
+    def _paginated(self, items: List, start_cursor: str = None) -> Dict:
+        offset = int(start_cursor) if start_cursor else 0
+        page = items[offset : offset + self.page_size]
+        next_offset = offset + self.page_size
+        has_more = next_offset < len(items)
+        return {
+            "results": page,
+            "has_more": has_more,
+            "next_cursor": str(next_offset) if has_more else None,
+        }
+
+    def _databases_query(
+        self, database_id: str, start_cursor: str = None, filter: Dict = None, **kwargs
+    ) -> Dict:
+        self._call("databases.query")
+        pages = self.databases_by_id[database_id]
+        if filter:
+            related_id = filter["relation"]["contains"]
+            pages = [
+                page
+                for page in pages
+                if {"id": related_id}
+                in page["properties"][filter["property"]]["relation"]
+            ]
+        return self._paginated(pages, start_cursor)
+
+    def _blocks_children_list(self, block_id: str, start_cursor: str = None, **kwargs):
+        self._call("blocks.children.list")
+        return self._paginated(self.blocks_by_parent.get(block_id, []), start_cursor)
+
+    def _pages_properties_retrieve(
+        self, page_id: str, property_id: str, start_cursor: str = None, **kwargs
+    ) -> Dict:
+        self._call("pages.properties.retrieve")
+        for pages in self.databases_by_id.values():
+            for page in pages:
+                if page["id"] == page_id:
+                    prop = next(
+                        p
+                        for p in page["properties"].values()
+                        if p.get("id") == property_id
+                    )
+                    items = [
+                        {"object": "property_item", "type": "relation", "relation": r}
+                        for r in prop["relation"]
+                    ]
+                    return self._paginated(items, start_cursor)
+        raise KeyError(page_id)
+
+
+class FakeOpenAI:
+    """Minimal `OpenAI` replacement answering chat completions locally.
+
+    Replies follow the summary and linking formats of `prompt.py`, citing
+    the first message and Notion step URLs (or reference IDs) found in the
+    prompt. Each call sleeps ``latency`` seconds plus
+    ``seconds_per_prompt_token`` for every prompt token and
+    ``seconds_per_token`` for every generated token, and ``rate_limit`` caps requests per second with a `RateLimitError`.
+    With ``stream=True`` the reply is yielded in chunks of a few tokens, the
+    latency spread across them.
+    """
+
+    STREAM_CHUNK_CHARS = 16
+
+    # URLs, or the reference IDs that stand in for them in compacted prompts
+    CITATION_PATTERN = re.compile(
+        r"https://[^\s|>]+|(?<=<)m\d+(?=\|)|(?<=\[)m\d+(?=\])"
+    )
+    STEP_URL_PATTERN = re.compile(r"^URL: (\S+)", re.MULTILINE)
+
+    def __init__(
+        self,
+        latency: float = 0.2,
+        seconds_per_token: float = 0.0,
+        rate_limit: Optional[float] = None,
+        seconds_per_prompt_token: float = 0.0,
+    ):
+        self.latency = latency
+        self.seconds_per_token = seconds_per_token
+        self.seconds_per_prompt_token = seconds_per_prompt_token
+        self.calls = Counter()
+        self.rate_limited = Counter()
+        self.rate_limit = _rate_limit(rate_limit)
+        self._lock = threading.Lock()
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self._create))
+
+    def _reply(self, prompt: str) -> str:
+        urls = self.CITATION_PATTERN.findall(prompt)[:3] or ["https://example.com"]
+        if "Notion Steps:" in prompt:
+            step_urls = self.STEP_URL_PATTERN.findall(prompt) or [
+                "https://notion.so/step"
+            ]
+            return "*Next Steps:*\n" + "\n".join(
+                f"- Follow up {n} (Assigned to: @user{n}, Related to: Pipeline, "
+                f"Next Step: <{step_urls[n % len(step_urls)]}|Step {n}>) "
+                f"<{url}|View Thread>"
+                for n, url in enumerate(urls)
+            )
+        bullets = "\n".join(
+            f"- Item {n} (Owner: @user{n}, Context: benchmark) <{url}|View Thread>"
+            for n, url in enumerate(urls)
+        )
+        return (
+            "Executive Summary\n---\n\n"
+            f"Strategic Initiatives:\n{bullets}\n\n"
+            f"Next Steps:\n{bullets}\n\n"
+            f"Brainstorm Ideas:\n{bullets}\n\n"
+            f"Key Links:\n- <{urls[0]}|Source>"
+        )
+
+    def _create(self, model: str, messages: List[Dict], stream: bool = False, **kwargs):
+        method = "chat.completions.create"
+        with self._lock:
+            self.calls[method] += 1
+            retry_after = self.rate_limit and self.rate_limit.check(method)
+            if retry_after:
+                self.rate_limited[method] += 1
+        if retry_after:
+            time.sleep(self.latency)
+            response = httpx.Response(
+                429,
+                headers={"Retry-After": str(math.ceil(retry_after))},
+                request=httpx.Request(
+                    "POST", "https://api.openai.com/v1/chat/completions"
+                ),
+            )
+            raise RateLimitError("Rate limit reached", response=response, body=None)
+
+        prompt = "\n".join(message["content"] for message in messages)
+        content = self._reply(prompt)
+        prompt_tokens = estimate_tokens(prompt)
+        completion_tokens = estimate_tokens(content)
+        duration = (
+            self.latency
+            + prompt_tokens * self.seconds_per_prompt_token
+            + completion_tokens * self.seconds_per_token
+        )
+        if stream:
+            return self._stream(content, duration)
+        time.sleep(duration)
+        return SimpleNamespace(
+            choices=[SimpleNamespace(message=SimpleNamespace(content=content))],
+            usage=SimpleNamespace(
+                prompt_tokens=prompt_tokens,
+                completion_tokens=completion_tokens,
+                total_tokens=prompt_tokens + completion_tokens,
+            ),
+        )
+
+    def _stream(self, content: str, duration: float):
+        pieces = [
+            content[i : i + self.STREAM_CHUNK_CHARS]
+            for i in range(0, len(content), self.STREAM_CHUNK_CHARS)
+        ]
+        for piece in pieces:
+            time.sleep(duration / len(pieces))
+            yield SimpleNamespace(
+                choices=[SimpleNamespace(delta=SimpleNamespace(content=piece))]
+            )
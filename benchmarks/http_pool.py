@@ -0,0 +1,131 @@
+"""Benchmark Slack API calls over the shared connection pool vs. urllib.
+
+Serves a minimal Slack Web API over HTTPS on localhost (with a self-signed
+certificate made by the `openssl` CLI) and counts the connections each
+client opens for the same calls. Each new connection is delayed by
+`--connect-latency` to stand in for the TCP and TLS round trips to
+slack.com. Run from the repository root:
+
+    python -m benchmarks.http_pool
+"""
+
+import argparse
+import json
+import os
+import ssl
+import subprocess
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import httpx
+from slack_sdk import WebClient
+
+from slack_client import PooledWebClient
+
+
+class SlackHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    # Headers and body go out in separate writes; without this, Nagle and
+    # delayed ACKs stall every kept-alive response by ~40ms
+    disable_nagle_algorithm = True
+
+    def setup(self):
+        super().setup()
+        with self.server.lock:
+            self.server.connections += 1
+        time.sleep(self.server.connect_latency)
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        body = json.dumps({"ok": True, "messages": [], "has_more": False}).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+def self_signed_certificate(directory: str):
+    cert, key = os.path.join(directory, "cert.pem"), os.path.join(directory, "key.pem")
+    subprocess.run(
+        ["openssl", "req", "-x509", "-newkey", "rsa:2048", "-nodes", "-days", "1"]
+        + ["-subj", "/CN=localhost", "-addext", "subjectAltName=IP:127.0.0.1"]
+        + ["-keyout", key, "-out", cert],
+        check=True,
+        capture_output=True,
+    )
+    return cert, key
+
+
+def start_server(cert: str, key: str, connect_latency: float) -> ThreadingHTTPServer:
+    server = ThreadingHTTPServer(("127.0.0.1", 0), SlackHandler)
+    server.daemon_threads = True
+    server.lock = threading.Lock()
+    server.connections = 0
+    server.connect_latency = connect_latency
+    context = ssl.create_default_context(ssl.Purpose.CLIENT_AUTH)
+    context.load_cert_chain(cert, key)
+    server.socket = context.wrap_socket(server.socket, server_side=True)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def run_calls(client, calls: int, workers: int) -> float:
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        list(
+            executor.map(
+                lambda i: client.conversations_replies(channel="C1", ts=f"{i}.0"),
+                range(calls),
+            )
+        )
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--calls", type=int, default=200)
+    parser.add_argument("--workers", type=int, default=8)
+    parser.add_argument(
+        "--connect-latency",
+        type=float,
+        default=0.05,
+        help="simulated seconds of TCP and TLS setup per new connection",
+    )
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        cert, key = self_signed_certificate(directory)
+        server = start_server(cert, key, args.connect_latency)
+        base_url = f"https://127.0.0.1:{server.server_port}/api/"
+        context = ssl.create_default_context(cafile=cert)
+
+        clients = {
+            "urllib": WebClient(token="xoxb-benchmark", base_url=base_url, ssl=context),
+            "pooled": PooledWebClient(
+                httpx.Client(
+                    transport=httpx.HTTPTransport(
+                        verify=context,
+                        limits=httpx.Limits(max_keepalive_connections=args.workers),
+                    )
+                ),
+                token="xoxb-benchmark",
+                base_url=base_url,
+            ),
+        }
+        print(f"{args.calls} calls, {args.workers} workers")
+        for name, client in clients.items():
+            server.connections = 0
+            elapsed = run_calls(client, args.calls, args.workers)
+            print(f"{name:8s} {elapsed:6.2f}s  {server.connections:4d} connections")
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
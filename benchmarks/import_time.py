@@ -0,0 +1,129 @@
+"""Benchmark cold-start import time of the agent's entry points.
+
+Each module is imported in a fresh interpreter with ``-X importtime``; the
+best of several runs is reported together with the API SDKs the import
+pulled in. Run from the repository root:
+
+    python -m benchmarks.import_time
+
+Pass ``--output imports.json`` to save a baseline and ``--baseline
+imports.json`` on a later run to fail when an import got slower or started
+loading an SDK it did not load before.
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+from typing import Dict, List
+
+MODULES = [
+    "config",
+    "summarizer",
+    "notion_fetcher",
+    "slack_client",
+    "main",
+    "ingestion",
+]
+SDKS = ["openai", "notion_client", "slack_sdk", "httpx"]
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def import_time(module: str) -> Dict:
+    """Import `module` in a new interpreter and parse the -X importtime log."""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=REPO_ROOT,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    total_us = 0
+    loaded = set()
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, cumulative, name = line.split("|")
+        if not cumulative.strip().isdigit():
+            continue  # header line
+        if name.strip() in SDKS:
+            loaded.add(name.strip())
+        # Top-level imports are indented by a single space
+        if name == f" {module}":
+            total_us = int(cumulative)
+    return {"seconds": total_us / 1e6, "sdks": sorted(loaded)}
+
+
+def measure(modules: List[str], repeat: int) -> Dict:
+    results = {}
+    for module in modules:
+        runs = [import_time(module) for _ in range(repeat)]
+        results[module] = {
+            "seconds": min(run["seconds"] for run in runs),
+            "sdks": runs[0]["sdks"],
+        }
+    return results
+
+
+def compare(results: Dict, baseline: Dict, max_regression: float) -> List[str]:
+    """Return the imports that are slower or load more SDKs than `baseline`."""
+    regressions = []
+    for module, row in results.items():
+        previous = baseline.get(module)
+        if not previous:
+            continue
+        new_sdks = sorted(set(row["sdks"]) - set(previous["sdks"]))
+        if new_sdks:
+            regressions.append(f"{module}: now imports {', '.join(new_sdks)}")
+        limit = previous["seconds"] * (1 + max_regression)
+        if row["seconds"] > limit:
+            regressions.append(
+                f"{module}: {row['seconds'] * 1000:.0f}ms "
+                f"(baseline {previous['seconds'] * 1000:.0f}ms)"
+            )
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--modules", nargs="+", default=MODULES)
+    parser.add_argument(
+        "--repeat", type=int, default=5, help="runs per module; the best is kept"
+    )
+    parser.add_argument("--output", help="write the results as JSON to this path")
+    parser.add_argument("--baseline", help="JSON results of an earlier run to compare")
+    parser.add_argument(
+        "--max-regression",
+        type=float,
+        default=0.25,
+        help="allowed relative import-time increase over the baseline",
+    )
+    args = parser.parse_args()
+
+    results = measure(args.modules, args.repeat)
+    print(f"{'module':16s} {'import':>8s}  sdks")
+    for module, row in results.items():
+        print(
+            f"{module:16s} {row['seconds'] * 1000:6.0f}ms  "
+            f"{', '.join(row['sdks']) or '-'}"
+        )
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+        print(f"\nResults written to {args.output}")
+
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            regressions = compare(results, json.load(f), args.max_regression)
+        if regressions:
+            print("\nRegressions against baseline:")
+            for regression in regressions:
+                print(f"  {regression}")
+            sys.exit(1)
+        print("\nNo regressions against baseline")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,149 @@
+"""Benchmark the memory of processed messages: plain dicts vs. Message records.
+
+Simulates a backfill of history pages decoded from JSON, as the Slack SDK
+returns them, and keeps every processed message the way
+`organize_conversations` does until the run ends. Reports the peak and
+retained memory traced by tracemalloc. Run from the repository root:
+
+    python -m benchmarks.message_memory
+"""
+
+import argparse
+import gc
+import json
+import random
+import time
+import tracemalloc
+
+from slack_client import SlackDataFetcher
+from benchmarks.fakes import FakeSlackClient
+
+PAGE_SIZE = 200
+
+
+def raw_file(i: int) -> dict:
+    """A Slack file object with the usual thumbnail and preview fields."""
+    file_id = f"F{i:09d}"
+    base = f"https://files.slack.com/files-pri/T0001-{file_id}"
+    thumbs = {}
+    for size in (64, 80, 160, 360, 480, 720, 800, 960, 1024):
+        thumbs[f"thumb_{size}"] = f"{base}/report_{size}.png"
+        thumbs[f"thumb_{size}_w"] = size
+        thumbs[f"thumb_{size}_h"] = size * 3 // 4
+    return {
+        "id": file_id,
+        "created": 1_700_000_000 + i,
+        "timestamp": 1_700_000_000 + i,
+        "name": f"report-{i}.pdf",
+        "title": f"Report {i}",
+        "mimetype": "application/pdf",
+        "filetype": "pdf",
+        "pretty_type": "PDF",
+        "user": "U00000001",
+        "user_team": "T0001",
+        "editable": False,
+        "size": 123456,
+        "mode": "hosted",
+        "is_external": False,
+        "external_type": "",
+        "is_public": True,
+        "public_url_shared": False,
+        "display_as_bot": False,
+        "username": "",
+        "url_private": f"{base}/report-{i}.pdf",
+        "url_private_download": f"{base}/download/report-{i}.pdf",
+        "media_display_type": "unknown",
+        "permalink": f"https://example.slack.com/files/U00000001/{file_id}/report-{i}.pdf",
+        "permalink_public": f"https://slack-files.com/T0001-{file_id}-0123456789",
+        "thumb_pdf": f"{base}/report_thumb_pdf.png",
+        "thumb_tiny": "AwAwACTTooooAKKKKACiiigAooooAKKKKACiiigD/9k=",
+        "preview": "Quarterly pipeline review\nRenewals and expansion\n" * 4,
+        "has_rich_preview": False,
+        "file_access": "visible",
+        **thumbs,
+    }
+
+
+def raw_pages(num_messages: int, num_users: int, file_every: int, seed: int = 7):
+    """Yield history pages decoded from JSON, so no strings are shared."""
+    rng = random.Random(seed)
+    words = "deal pipeline demo pricing renewal contract follow up call notes".split()
+    for start in range(0, num_messages, PAGE_SIZE):
+        page = []
+        for i in range(start, min(start + PAGE_SIZE, num_messages)):
+            msg = {
+                "type": "message",
+                "user": f"U{i % num_users:08d}",
+                "ts": f"{1_700_000_000 + i * 7:.6f}",
+                "text": " ".join(rng.choices(words, k=20)),
+                "team": "T0001",
+                "client_msg_id": f"{i:08x}-0000-4000-8000-000000000000",
+                "blocks": [],
+            }
+            if file_every and i % file_every == 0:
+                msg["files"] = [raw_file(i)]
+            page.append(msg)
+        yield json.loads(json.dumps(page))
+
+
+def process_as_dict(fetcher, message: dict, channel_id: str) -> dict:
+    """How messages were processed before the Message record."""
+    user_id = message.get("user", "")
+    timestamp = message.get("ts", "")
+    return {
+        "text": message.get("text", ""),
+        "files": message.get("files", []),
+        "links": [],
+        "timestamp": timestamp,
+        "user": fetcher.user_map.get(user_id, "Unknown User"),
+        "user_id": user_id,
+        "thread_ts": message.get("thread_ts", ""),
+        "message_url": fetcher._generate_message_url(channel_id, timestamp),
+    }
+
+
+def measure(process, args):
+    fetcher = SlackDataFetcher(client=FakeSlackClient(num_messages=0, latency=0))
+    # Names decoded from users.info responses, one string per user
+    fetcher.user_map = {
+        f"U{i:08d}": json.loads(json.dumps(f"user{i}")) for i in range(args.users)
+    }
+    gc.collect()
+    tracemalloc.start()
+    start = time.perf_counter()
+    kept = []
+    for page in raw_pages(args.messages, args.users, args.file_every):
+        kept.extend(process(fetcher, msg, "C000001") for msg in page)
+        del page
+    elapsed = time.perf_counter() - start
+    retained, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    assert len(kept) == args.messages
+    return elapsed, retained, peak
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--messages", type=int, default=100_000)
+    parser.add_argument("--users", type=int, default=200)
+    parser.add_argument(
+        "--file-every", type=int, default=10, help="attach a file to every Nth message"
+    )
+    args = parser.parse_args()
+
+    results = {
+        "dict": measure(process_as_dict, args),
+        "Message": measure(SlackDataFetcher._process_message_content, args),
+    }
+    print(f"messages={args.messages} (a file on every {args.file_every})")
+    for name, (elapsed, retained, peak) in results.items():
+        print(
+            f"{name:8s} peak={peak / 2**20:7.1f} MiB  retained={retained / 2**20:7.1f} MiB"
+            f"  process={elapsed:.2f}s"
+        )
+    before, after = results["dict"][2], results["Message"][2]
+    print(f"peak reduction: {1 - after / before:.0%}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,112 @@
+"""Benchmark prompt compaction: URLs as reference IDs vs. full URLs.
+
+Builds a sample transcript from the fake Slack client, with some shared
+files and channel joins mixed in, and reports the prompt compression ratio
+and the summarize + link latency against a fake model whose latency grows
+with the prompt. Run from the repository root:
+
+    python -m benchmarks.prompt_refs
+"""
+
+import argparse
+import tempfile
+import time
+
+import summarizer
+from benchmarks.fakes import FakeOpenAI, FakeSlackClient
+from llm_cache import LLMResponseCache
+from models import FileRef
+from prompt import get_sales_summary_prompt
+from prompt_refs import INSTRUCTIONS, PromptRefs
+from slack_client import SlackDataFetcher
+from tokens import estimate_tokens
+from user_directory import UserDirectory
+
+
+def sample_messages(num_messages: int, num_threads: int):
+    client = FakeSlackClient(
+        num_messages=num_messages, num_threads=num_threads, latency=0
+    )
+    fetcher = SlackDataFetcher(client=client)
+    fetcher.user_map = UserDirectory(client, path=None)
+    messages = fetcher.get_channel_messages("C000001")
+    for i, msg in enumerate(messages):
+        if i % 10 == 0:
+            msg.files = (
+                FileRef(
+                    f"report-{i}.pdf",
+                    f"https://files.slack.com/files-pri/T0001/F{i:06d}/report-{i}.pdf",
+                ),
+            )
+        if i % 25 == 0:
+            msg.text = f"<@{msg.user_id}> has joined the channel"
+    return fetcher.user_map, messages
+
+
+def time_pipeline(model, user_map, conversation, compact):
+    with tempfile.TemporaryDirectory() as cache_dir:
+        conversation_summarizer = summarizer.ConversationSummarizer(
+            user_map,
+            llm_cache=LLMResponseCache(cache_dir),
+            bypass_cache=True,
+            compact_prompts=compact,
+            client=model,
+        )
+        start = time.perf_counter()
+        summary = conversation_summarizer.summarize_conversation(
+            conversation, "01/01 00:00", "01/02 00:00"
+        )
+        steps = "\n".join(
+            f"Step: Step {i}\nURL: https://www.notion.so/workspace/Step-{i}-{i:032x}"
+            for i in range(20)
+        )
+        conversation_summarizer.link_next_steps_to_notion_steps(summary, steps)
+        return time.perf_counter() - start, summary
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--messages", type=int, default=500)
+    parser.add_argument("--threads", type=int, default=50)
+    parser.add_argument("--latency", type=float, default=0.2)
+    parser.add_argument(
+        "--prompt-token-seconds",
+        type=float,
+        default=0.0001,
+        help="simulated model time per prompt token",
+    )
+    args = parser.parse_args()
+
+    user_map, messages = sample_messages(args.messages, args.threads)
+    conversation = summarizer.ConversationSummarizer(
+        user_map, llm_cache=LLMResponseCache(tempfile.mkdtemp())
+    )._prepare_conversation(messages)
+
+    start = time.perf_counter()
+    refs = PromptRefs()
+    compacted = refs.compact_conversation(conversation)
+    compact_seconds = time.perf_counter() - start
+
+    before = estimate_tokens(get_sales_summary_prompt(conversation, "", ""))
+    after = estimate_tokens(get_sales_summary_prompt(compacted, "", "") + INSTRUCTIONS)
+    print(f"transcript: {len(messages)} messages, {len(refs.urls)} references")
+    print(
+        f"summary prompt: ~{before} -> ~{after} tokens "
+        f"({after / before:.0%} of original, {before / after:.2f}x smaller)"
+    )
+    print(f"compaction time: {compact_seconds * 1000:.1f}ms")
+
+    model = FakeOpenAI(
+        latency=args.latency, seconds_per_prompt_token=args.prompt_token_seconds
+    )
+    full, _ = time_pipeline(model, user_map, conversation, False)
+    compact, summary = time_pipeline(model, user_map, conversation, True)
+    print(
+        f"summarize + link: {full:.2f}s with URLs, {compact:.2f}s compacted "
+        f"({(compact - full) / full:+.0%})"
+    )
+    assert "slack.com/archives/" in summary, "references were not expanded"
+
+
+if __name__ == "__main__":
+    main()
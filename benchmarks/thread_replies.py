@@ -0,0 +1,48 @@
+"""Benchmark sequential vs. concurrent thread-reply fetching.
+
+Run from the repository root:
+
+    python -m benchmarks.thread_replies
+"""
+
+import argparse
+import time
+
+from benchmarks.fakes import FakeSlackClient
+from slack_client import SlackDataFetcher
+from user_directory import UserDirectory
+
+
+def time_fetch(num_threads: int, workers: int, latency: float) -> float:
+    client = FakeSlackClient(
+        num_messages=max(num_threads, 1), num_threads=num_threads, latency=latency
+    )
+    fetcher = SlackDataFetcher(client=client, max_reply_workers=workers)
+    fetcher.user_map = UserDirectory(client, path=None)
+    start = time.perf_counter()
+    messages = fetcher.get_channel_messages("C000001")
+    elapsed = time.perf_counter() - start
+    assert sum(1 for m in messages if m.thread_replies) == num_threads
+    return elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--latency", type=float, default=0.05)
+    parser.add_argument("--workers", type=int, default=8)
+    parser.add_argument("--threads", type=int, nargs="+", default=[10, 50, 150])
+    args = parser.parse_args()
+
+    print(f"latency={args.latency * 1000:.0f}ms workers={args.workers}")
+    print(f"{'threads':>8} {'sequential':>12} {'concurrent':>12} {'speedup':>8}")
+    for num_threads in args.threads:
+        sequential = time_fetch(num_threads, 1, args.latency)
+        concurrent = time_fetch(num_threads, args.workers, args.latency)
+        print(
+            f"{num_threads:>8} {sequential:>11.2f}s {concurrent:>11.2f}s "
+            f"{sequential / concurrent:>7.1f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
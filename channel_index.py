@@ -0,0 +1,116 @@
+import logging
+import threading
+import time
+from typing import Callable, Dict, Iterable, Iterator, List, Optional
+
+from cache_utils import load_json, save_json
+from config import CHANNEL_INDEX_PATH, CHANNEL_MISS_TTL_SECONDS, SLACK_CHANNEL_IDS
+
+logger = logging.getLogger(__name__)
+
+
+class InMemoryChannelBacking:
+    """Keeps the channel index for the lifetime of the process only."""
+
+    def __init__(self):
+        self._channels: Dict[str, str] = {}
+
+    def load(self) -> Dict[str, str]:
+        return dict(self._channels)
+
+    def save(self, channels: Dict[str, str]) -> None:
+        self._channels = dict(channels)
+
+
+class JsonFileChannelBacking:
+    """Persists the channel index to a JSON file between runs."""
+
+    def __init__(self, path: str = CHANNEL_INDEX_PATH):
+        self.path = path
+
+    def load(self) -> Dict[str, str]:
+        return load_json(self.path, {})
+
+    def save(self, channels: Dict[str, str]) -> None:
+        save_json(self.path, channels)
+
+
+class ChannelIndex:
+    """Name-to-ID lookup for Slack channels shared by the fetch and post paths.
+
+    Channels listed in SLACK_CHANNEL_IDS are returned without any API call.
+    Other names are served from the backing store; a miss invalidates the
+    index and rebuilds it with one scan of `list_channels`. Names the scan
+    does not find (e.g. a typo in SUMMARY_CHANNELS) are remembered, and do
+    not trigger another scan for `miss_ttl_seconds`.
+    """
+
+    def __init__(
+        self,
+        list_channels: Callable[[], Iterator[List[Dict]]],
+        backing=None,
+        channel_ids: Optional[Dict[str, str]] = None,
+        miss_ttl_seconds: float = CHANNEL_MISS_TTL_SECONDS,
+    ):
+        self.list_channels = list_channels
+        self.backing = backing or JsonFileChannelBacking()
+        self.static_ids = dict(
+            SLACK_CHANNEL_IDS if channel_ids is None else channel_ids
+        )
+        self.miss_ttl_seconds = miss_ttl_seconds
+        self._lock = threading.Lock()
+        self._channels = self.backing.load()
+        self._misses: Dict[str, float] = {}  # name -> monotonic time of the miss
+
+    def refresh(self) -> None:
+        """Rebuild the index from a full channel scan."""
+        channels = {}
+        for page in self.list_channels():
+            for channel in page:
+                channels[channel["name"]] = channel["id"]
+        self._channels = channels
+        self.backing.save(channels)
+        logger.info(f"Indexed {len(channels)} Slack channels")
+
+    def invalidate(self, channel_name: Optional[str] = None) -> None:
+        """Forget one channel (e.g. after channel_not_found) or the whole index."""
+        with self._lock:
+            if channel_name is None:
+                self._channels = {}
+                self._misses = {}
+            else:
+                self._channels.pop(channel_name, None)
+                self._misses.pop(channel_name, None)
+            self.backing.save(self._channels)
+
+    def lookup_many(self, channel_names: Iterable[str]) -> Dict[str, str]:
+        """Return IDs for the names that exist, scanning Slack at most once."""
+        channel_names = list(channel_names)
+        with self._lock:
+            now = time.monotonic()
+            unknown = [
+                name
+                for name in channel_names
+                if name not in self.static_ids
+                and name not in self._channels
+                and (
+                    name not in self._misses
+                    or now - self._misses[name] >= self.miss_ttl_seconds
+                )
+            ]
+            if unknown:
+                self.refresh()
+                for name in unknown:
+                    if name not in self._channels:
+                        logger.warning(f"Slack channel {name} not found")
+                        self._misses[name] = now
+
+            channel_ids = {}
+            for name in channel_names:
+                channel_id = self.static_ids.get(name) or self._channels.get(name)
+                if channel_id:
+                    channel_ids[name] = channel_id
+            return channel_ids
+
+    def lookup(self, channel_name: str) -> Optional[str]:
+        return self.lookup_many([channel_name]).get(channel_name)
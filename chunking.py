@@ -0,0 +1,30 @@
+from typing import List
+
+from config import MAX_CHUNK_SIZE
+
+
+def chunk_text(text: str, max_size: int = MAX_CHUNK_SIZE) -> List[str]:
+    """Split text into chunks of at most `max_size` characters at line breaks.
+
+    A single line longer than `max_size` is split mid-line.
+    """
+    chunks = []
+    current_chunk = ""
+
+    for line in text.split("\n"):
+        while len(line) > max_size:
+            if current_chunk.strip():
+                chunks.append(current_chunk.strip())
+            current_chunk = ""
+            chunks.append(line[:max_size])
+            line = line[max_size:]
+        if len(current_chunk) + len(line) + 1 <= max_size:
+            current_chunk += line + "\n"
+        else:
+            chunks.append(current_chunk.strip())
+            current_chunk = line + "\n"
+
+    if current_chunk.strip():
+        chunks.append(current_chunk.strip())
+
+    return [chunk for chunk in chunks if chunk]
@@ -0,0 +1,71 @@
+"""API clients shared by everything in the process, built on first use.
+
+Each SDK is imported only when its client is first requested, so a run
+loads just the clients its stages call: a summary served from the LLM cache
+never imports `openai`, and `notion_client` is imported by the Notion stage
+while Slack is being fetched.
+
+All three clients send their requests through one pooled httpx transport,
+so connections (and their TLS sessions) are kept alive and reused across
+calls instead of being opened per request.
+"""
+
+from functools import lru_cache
+
+import config
+
+
+@lru_cache(maxsize=None)
+def http_transport():
+    """The connection pool shared by every API client."""
+    import httpx
+
+    return httpx.HTTPTransport(
+        limits=httpx.Limits(
+            max_connections=config.HTTP_MAX_CONNECTIONS,
+            max_keepalive_connections=config.HTTP_MAX_KEEPALIVE_CONNECTIONS,
+            keepalive_expiry=config.HTTP_KEEPALIVE_EXPIRY_SECONDS,
+        )
+    )
+
+
+def http_client(**kwargs):
+    """A new httpx client on the shared transport.
+
+    Each SDK gets its own client, as Notion sets its base URL and auth
+    headers on the client it is given.
+    """
+    import httpx
+
+    return httpx.Client(transport=http_transport(), **kwargs)
+
+
+@lru_cache(maxsize=None)
+def openai_client():
+    from openai import OpenAI
+
+    # Rate-limited and transient failures are retried by rate_limiter, which
+    # paces them with every other OpenAI call, not by the SDK
+    return OpenAI(
+        api_key=config.OPENAI_API_KEY,
+        http_client=http_client(follow_redirects=True),
+        max_retries=0,
+    )
+
+
+@lru_cache(maxsize=None)
+def slack_web_client():
+    from slack_client import CountingConnectionErrorRetryHandler, PooledWebClient
+
+    return PooledWebClient(
+        http_client(),
+        token=config.SLACK_BOT_TOKEN,
+        retry_handlers=[CountingConnectionErrorRetryHandler()],
+    )
+
+
+@lru_cache(maxsize=None)
+def notion_api_client():
+    from notion_client import Client
+
+    return Client(auth=config.NOTION_API_KEY, client=http_client())
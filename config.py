@@ -10,24 +10,136 @@ SLACK_TEST_CHANNEL = os.getenv("BOT_TEST_CHANNEL")
 
 # API Tokens
 SLACK_BOT_TOKEN = os.getenv("SLACK_BOT_TOKEN")
+# App-level token (xapp-...) for receiving events over Socket Mode
+SLACK_APP_TOKEN = os.getenv("SLACK_APP_TOKEN")
 OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
 NOTION_API_KEY = os.getenv("NOTION_API_KEY")
 NOTION_STEPS_DATABASE_ID = os.getenv("NOTION_STEPS_DATABASE_ID")
 NOTION_PROCESSES_DATABASE_ID = os.getenv("NOTION_PROCESS_DATABASE_ID")
 NOTION_SOP_DATABASE_ID = os.getenv("NOTION_SOP_DATABASE_ID")
+# Candidate steps sent to the linking prompt per Next Steps bullet (0 sends all)
+NOTION_STEP_TOP_K = int(os.getenv("NOTION_STEP_TOP_K", "5"))
+NOTION_PAGE_CACHE_PATH = os.getenv("NOTION_PAGE_CACHE_PATH", ".cache/notion_pages.json")
 
 # Time configurations with explicit timezone
 EST = pytz.timezone("America/New_York")
-CURRENT_DATE = datetime.now(EST)
 HOURS_DELTA = 24
-START_DATE = (CURRENT_DATE - timedelta(hours=HOURS_DELTA)).replace(
-    minute=0, second=0, microsecond=0
-)
-END_DATE = CURRENT_DATE.replace(microsecond=999999)
 
 # Formatting
 MAX_CHUNK_SIZE = 3999
 
+# Estimated prompt tokens per LLM call; larger conversations are summarized
+# in chunks and merged
+MAX_PROMPT_TOKENS = int(os.getenv("MAX_PROMPT_TOKENS", "60000"))
+# Replace URLs in LLM prompts with short reference IDs, expanded in the replies
+COMPACT_PROMPTS = os.getenv("COMPACT_PROMPTS", "true").lower() == "true"
+
+# Slack pagination (Slack recommends no more than 200 items per page)
+SLACK_PAGE_SIZE = 200
+
+# Local message store for incremental Slack syncs
+USE_MESSAGE_STORE = os.getenv("USE_MESSAGE_STORE", "true").lower() == "true"
+MESSAGE_STORE_PATH = os.getenv("MESSAGE_STORE_PATH", ".cache/slack_messages.db")
+# Threads with activity this recent are refetched on every sync to pick up edits
+STORE_THREAD_REFRESH_HOURS = 3
+# Read the window straight from the store kept current by ingestion.py,
+# without fetching any Slack history at summary time
+USE_INGESTED_MESSAGES = os.getenv("USE_INGESTED_MESSAGES", "false").lower() == "true"
+
+# Slack user directory cache
+USER_CACHE_PATH = os.getenv("USER_CACHE_PATH", ".cache/slack_users.json")
+USER_CACHE_TTL_HOURS = 24
+
+# LLM response cache
+LLM_CACHE_DIR = os.getenv("LLM_CACHE_DIR", ".cache/llm")
+LLM_CACHE_MAX_AGE_HOURS = 48
+LLM_CACHE_MAX_ENTRIES = 500
+# Skip cached replies and always call the model (fresh replies are still cached)
+LLM_CACHE_BYPASS = os.getenv("LLM_CACHE_BYPASS", "false").lower() == "true"
+
+# Incremental rolling summaries
+INCREMENTAL_SUMMARIES = os.getenv("INCREMENTAL_SUMMARIES", "false").lower() == "true"
+ROLLING_SUMMARY_DIR = os.getenv("ROLLING_SUMMARY_DIR", ".cache/rolling_summaries")
+# Rebuild the summary with a full pass once it holds more bullets than this
+ROLLING_SUMMARY_MAX_BULLETS = 40
+
+# Stream summaries into Slack: post a placeholder and update it as sections complete
+STREAM_SUMMARIES = os.getenv("STREAM_SUMMARIES", "false").lower() == "true"
+# Minimum seconds between chat.update calls for one message (Slack allows ~1/s)
+SLACK_UPDATE_INTERVAL_SECONDS = float(os.getenv("SLACK_UPDATE_INTERVAL_SECONDS", "2"))
+
+# Outbound posting: Slack allows about one chat.postMessage per second per channel
+SLACK_POST_INTERVAL_SECONDS = float(os.getenv("SLACK_POST_INTERVAL_SECONDS", "1"))
+# Minimum spacing between posts across all channels of the workspace
+SLACK_WORKSPACE_POST_INTERVAL_SECONDS = float(
+    os.getenv("SLACK_WORKSPACE_POST_INTERVAL_SECONDS", "0.1")
+)
+
+# Rate limiting of every Slack, Notion and OpenAI call (see rate_limiter.py).
+# Optional ceilings in requests per second per tier, e.g.
+# "notion=3,slack.tier3=1"; tiers without one adapt from their first 429.
+API_RATE_LIMITS = {
+    "slack.chat_postMessage": 1 / SLACK_WORKSPACE_POST_INTERVAL_SECONDS,
+    **{
+        tier.strip(): float(rate)
+        for tier, rate in (
+            pair.split("=", 1)
+            for pair in os.getenv("API_RATE_LIMITS", "").split(",")
+            if "=" in pair
+        )
+    },
+}
+# Retries of a rate-limited call before its error is raised
+RATE_LIMIT_MAX_RETRIES = int(os.getenv("RATE_LIMIT_MAX_RETRIES", "5"))
+
+# Connection pool shared by the Slack, Notion and OpenAI clients
+HTTP_MAX_CONNECTIONS = int(os.getenv("HTTP_MAX_CONNECTIONS", "100"))
+# Idle connections kept open for reuse; enough for all the worker pools below
+HTTP_MAX_KEEPALIVE_CONNECTIONS = int(os.getenv("HTTP_MAX_KEEPALIVE_CONNECTIONS", "40"))
+HTTP_KEEPALIVE_EXPIRY_SECONDS = float(os.getenv("HTTP_KEEPALIVE_EXPIRY_SECONDS", "30"))
+
+# Concurrency
+THREAD_REPLY_WORKERS = int(os.getenv("THREAD_REPLY_WORKERS", "8"))
+CHANNEL_FETCH_WORKERS = int(os.getenv("CHANNEL_FETCH_WORKERS", "4"))
+USER_LOOKUP_WORKERS = int(os.getenv("USER_LOOKUP_WORKERS", "8"))
+NOTION_BLOCK_WORKERS = int(os.getenv("NOTION_BLOCK_WORKERS", "4"))
+LLM_WORKERS = int(os.getenv("LLM_WORKERS", "4"))
+SUMMARY_CHUNK_WORKERS = int(os.getenv("SUMMARY_CHUNK_WORKERS", "4"))
+# Channels posted to in parallel; the threads mostly sleep between paced posts
+OUTBOUND_WORKERS = int(os.getenv("OUTBOUND_WORKERS", "16"))
+
 # Channel configurations
+# Comma-separated list of channels to summarize, e.g. "sales-team,marketing"
+SUMMARY_CHANNELS = [
+    name.strip()
+    for name in os.getenv("SUMMARY_CHANNELS", "sales-team").split(",")
+    if name.strip()
+]
+# Known channel IDs skip the name lookup entirely, e.g. "sales-team=C0123,marketing=C0456"
+SLACK_CHANNEL_IDS = dict(
+    pair.strip().split("=", 1)
+    for pair in os.getenv("SLACK_CHANNEL_IDS", "").split(",")
+    if "=" in pair
+)
+CHANNEL_INDEX_PATH = os.getenv("CHANNEL_INDEX_PATH", ".cache/slack_channels.json")
+# A name that a channel scan did not find is not rescanned for this long
+CHANNEL_MISS_TTL_SECONDS = float(os.getenv("CHANNEL_MISS_TTL_SECONDS", "600"))
 EXCLUDE_ARCHIVED = True
 DEBUG_LOGGING = True
+
+
+def __getattr__(name):
+    """Compute CURRENT_DATE, START_DATE and END_DATE when read.
+
+    They are not fixed at import, so a long-running process such as the
+    ingestion daemon always sees the current window.
+    """
+    if name == "CURRENT_DATE":
+        return datetime.now(EST)
+    if name == "START_DATE":
+        return (datetime.now(EST) - timedelta(hours=HOURS_DELTA)).replace(
+            minute=0, second=0, microsecond=0
+        )
+    if name == "END_DATE":
+        return datetime.now(EST).replace(microsecond=999999)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
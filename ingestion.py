@@ -0,0 +1,198 @@
+"""Long-running ingestion of Slack message events into the message store.
+
+Run with Socket Mode (needs SLACK_APP_TOKEN and the message.channels event
+subscription):
+
+    python ingestion.py --backfill
+
+or replay a JSONL file of recorded events instead:
+
+    python ingestion.py --replay events.jsonl
+
+With USE_INGESTED_MESSAGES=true, `main.py` then reads each channel's window
+from the store without fetching Slack history.
+"""
+
+import argparse
+import json
+import logging
+import queue
+import time
+from datetime import datetime, timedelta
+from typing import Dict, Iterator, List, Optional
+
+from slack_sdk.errors import SlackApiError
+
+import config
+from instrumentation import metrics
+from message_store import MessageStore
+from slack_client import SlackDataFetcher
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Subtypes whose "message" field holds the current version of another message
+EDIT_SUBTYPES = {"message_changed", "message_replied"}
+# How often messages that fell out of the summary window are pruned
+PRUNE_INTERVAL_SECONDS = 3600
+
+
+class ReplayEventSource:
+    """Yields events recorded one per line in a JSONL file.
+
+    Lines may hold bare events or Events API envelopes with an "event" key.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+
+    def __iter__(self) -> Iterator[Dict]:
+        with open(self.path, encoding="utf-8") as f:
+            for line in f:
+                if not line.strip():
+                    continue
+                payload = json.loads(line)
+                yield payload.get("event", payload)
+
+
+class SocketModeEventSource:
+    """Yields events delivered by the Slack Events API over Socket Mode."""
+
+    def __init__(self, app_token: Optional[str] = None, web_client=None):
+        self.app_token = app_token or config.SLACK_APP_TOKEN
+        self.web_client = web_client
+
+    def __iter__(self) -> Iterator[Dict]:
+        from slack_sdk.socket_mode import SocketModeClient
+        from slack_sdk.socket_mode.response import SocketModeResponse
+
+        events = queue.Queue()
+
+        def listener(client, request):
+            client.send_socket_mode_response(
+                SocketModeResponse(envelope_id=request.envelope_id)
+            )
+            if request.type == "events_api":
+                events.put(request.payload.get("event", {}))
+
+        client = SocketModeClient(app_token=self.app_token, web_client=self.web_client)
+        client.socket_mode_request_listeners.append(listener)
+        client.connect()
+        try:
+            while True:
+                yield events.get()
+        finally:
+            client.close()
+
+
+class EventIngestor:
+    """Applies message, edit, delete and thread-reply events to the store.
+
+    Events are normalized with `SlackDataFetcher._process_message_content`, so
+    stored messages look exactly like those from a history sync. Only events
+    from the configured summary channels are kept.
+    """
+
+    def __init__(
+        self,
+        slack_fetcher: SlackDataFetcher,
+        store: MessageStore,
+        channel_names: Optional[List[str]] = None,
+    ):
+        self.slack_fetcher = slack_fetcher
+        self.store = store
+        self.channel_ids = slack_fetcher.channel_index.lookup_many(
+            channel_names or config.SUMMARY_CHANNELS
+        )
+        self._watched = set(self.channel_ids.values())
+        self._last_prune = 0.0
+
+    def backfill(self) -> None:
+        """Sync each channel's current window once, e.g. on first start."""
+        start_ts = (datetime.now() - timedelta(hours=config.HOURS_DELTA)).timestamp()
+        for channel_name, channel_id in self.channel_ids.items():
+            logger.info(f"Backfilling {channel_name}...")
+            try:
+                self.slack_fetcher.sync_channel(channel_id, start_ts, time.time())
+            except SlackApiError as e:
+                logger.error(f"Error backfilling {channel_name}: {e}")
+
+    def run(self, source) -> None:
+        """Consume events from `source` until it is exhausted."""
+        logger.info(f"Ingesting events for {', '.join(self.channel_ids)}...")
+        for event in source:
+            try:
+                self.handle(event)
+            except Exception as e:
+                logger.error(f"Error ingesting event {event.get('ts')}: {e}")
+            self._prune_if_due()
+
+    def handle(self, event: Dict) -> bool:
+        """Apply one event; returns False if it was ignored."""
+        channel_id = event.get("channel")
+        if event.get("type") != "message" or channel_id not in self._watched:
+            return False
+        metrics.increment("ingest.events")
+
+        subtype = event.get("subtype")
+        if subtype == "message_deleted":
+            self.store.delete_message(channel_id, event["deleted_ts"])
+            return True
+        message = event.get("message", {}) if subtype in EDIT_SUBTYPES else event
+        if not message.get("ts"):
+            return False
+
+        self.slack_fetcher.user_map.resolve([message.get("user")])
+        processed = self.slack_fetcher._process_message_content(message, channel_id)
+
+        thread_ts = message.get("thread_ts")
+        is_reply = bool(thread_ts) and thread_ts != message["ts"]
+        if is_reply:
+            self.store.upsert_replies(channel_id, [processed])
+        # Broadcast replies also appear in the channel itself
+        if not is_reply or message.get("subtype") == "thread_broadcast":
+            self.store.upsert_messages(channel_id, [processed])
+            watermark = self.store.get_watermark(channel_id)
+            if watermark is None or float(message["ts"]) > float(watermark):
+                self.store.set_watermark(channel_id, message["ts"])
+        return True
+
+    def _prune_if_due(self) -> None:
+        if time.monotonic() - self._last_prune < PRUNE_INTERVAL_SECONDS:
+            return
+        self._last_prune = time.monotonic()
+        start_ts = (datetime.now() - timedelta(hours=config.HOURS_DELTA)).timestamp()
+        for channel_id in self._watched:
+            self.store.prune(channel_id, start_ts)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--replay", help="JSONL file of recorded events to ingest")
+    parser.add_argument(
+        "--backfill",
+        action="store_true",
+        help="sync the current window from Slack history before ingesting",
+    )
+    args = parser.parse_args()
+
+    store = MessageStore()
+    slack_fetcher = SlackDataFetcher(store=store)
+    ingestor = EventIngestor(slack_fetcher, store)
+    if args.backfill:
+        ingestor.backfill()
+
+    if args.replay:
+        source = ReplayEventSource(args.replay)
+    else:
+        source = SocketModeEventSource()
+    try:
+        ingestor.run(source)
+    except KeyboardInterrupt:
+        logger.info("Stopping ingestion")
+    finally:
+        store.close()
+
+
+if __name__ == "__main__":
+    main()
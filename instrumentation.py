@@ -0,0 +1,185 @@
+import functools
+import json
+import logging
+import os
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+from rate_limiter import RateLimiter, rate_limiter
+
+logger = logging.getLogger(__name__)
+
+# Attribute values returned as-is by InstrumentedClient instead of being proxied
+PLAIN_TYPES = (str, bytes, int, float, bool, dict, list, tuple, type(None))
+
+
+class RunMetrics:
+    """Collects per-run timings, API call counts, retries and token usage."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self) -> None:
+        with self._lock:
+            self.started_at = time.time()
+            self.stages: Dict[str, Dict[str, float]] = {}
+            self.api_calls = Counter()
+            self.retries = Counter()
+            self.throttled_seconds = Counter()
+            self.counters = Counter()
+            self.token_usage: Dict[str, Dict[str, int]] = {}
+            self.critical_path: List[Dict[str, float]] = []
+
+    @contextmanager
+    def stage(self, name: str):
+        """Time a block of work, accumulating across repeated or parallel runs."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - start
+            with self._lock:
+                stage = self.stages.setdefault(
+                    name, {"count": 0, "total_seconds": 0.0, "max_seconds": 0.0}
+                )
+                stage["count"] += 1
+                stage["total_seconds"] += elapsed
+                stage["max_seconds"] = max(stage["max_seconds"], elapsed)
+
+    def count_call(self, endpoint: str) -> None:
+        with self._lock:
+            self.api_calls[endpoint] += 1
+
+    def count_retry(self, endpoint: str) -> None:
+        with self._lock:
+            self.retries[endpoint] += 1
+
+    def record_throttle(self, tier: str, seconds: float) -> None:
+        """Add time spent waiting on the rate limiter of an API tier."""
+        with self._lock:
+            self.throttled_seconds[tier] += seconds
+
+    def increment(self, name: str, amount: int = 1) -> None:
+        with self._lock:
+            self.counters[name] += amount
+
+    def record_usage(self, model: str, usage: Any) -> None:
+        """Add the prompt/completion token counts of an OpenAI response."""
+        if usage is None:
+            return
+        with self._lock:
+            totals = self.token_usage.setdefault(
+                model,
+                {
+                    "requests": 0,
+                    "prompt_tokens": 0,
+                    "completion_tokens": 0,
+                    "total_tokens": 0,
+                },
+            )
+            totals["requests"] += 1
+            for field in ("prompt_tokens", "completion_tokens", "total_tokens"):
+                totals[field] += getattr(usage, field, 0) or 0
+
+    def record_critical_path(self, path: List[Dict[str, float]]) -> None:
+        """Keep the chain of pipeline stages that bounded the run's wall time."""
+        with self._lock:
+            self.critical_path = list(path)
+        if path:
+            logger.info(
+                "Critical path: "
+                + " -> ".join(f"{step['stage']} ({step['seconds']}s)" for step in path)
+            )
+
+    def report(self) -> Dict:
+        with self._lock:
+            return {
+                "started_at": datetime.fromtimestamp(self.started_at).isoformat(),
+                "wall_seconds": round(time.time() - self.started_at, 3),
+                "stages": {
+                    name: {key: round(value, 3) for key, value in stage.items()}
+                    for name, stage in self.stages.items()
+                },
+                "api_calls": dict(self.api_calls),
+                "retries": dict(self.retries),
+                "throttled_seconds": {
+                    tier: round(seconds, 3)
+                    for tier, seconds in self.throttled_seconds.items()
+                },
+                "counters": dict(self.counters),
+                "token_usage": dict(self.token_usage),
+                "critical_path": list(self.critical_path),
+            }
+
+    def write_report(self, directory: str = "outputs") -> str:
+        """Write the report as JSON to `directory` and return its path."""
+        os.makedirs(directory, exist_ok=True)
+        stamp = datetime.fromtimestamp(self.started_at).strftime("%Y%m%d_%H%M%S")
+        path = os.path.join(directory, f"run_report_{stamp}.json")
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(self.report(), f, indent=2)
+        logger.info(f"Run report written to {path}")
+        return path
+
+
+# Shared by every component in the process, like the module-level OpenAI client
+metrics = RunMetrics()
+
+
+def timed(stage_name: str):
+    """Decorator recording each call of the function as a stage."""
+
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with metrics.stage(stage_name):
+                return func(*args, **kwargs)
+
+        return wrapper
+
+    return decorator
+
+
+class InstrumentedClient:
+    """Proxy around an API client that counts and rate limits calls per endpoint.
+
+    Nested resources (e.g. `notion.databases.query` or
+    `openai.chat.completions.create`) are proxied too, so every call is
+    counted under its dotted path. Calls go through the shared rate limiter,
+    which retries rate-limited ones; each attempt is counted.
+    """
+
+    def __init__(
+        self,
+        target: Any,
+        prefix: str,
+        run_metrics: Optional[RunMetrics] = None,
+        limiter: Optional[RateLimiter] = None,
+    ):
+        self._target = target
+        self._prefix = prefix
+        self._metrics = run_metrics or metrics
+        self._limiter = limiter or rate_limiter
+
+    def __getattr__(self, name: str) -> Any:
+        attr = getattr(self._target, name)
+        endpoint = f"{self._prefix}.{name}"
+        if callable(attr):
+
+            @functools.wraps(attr)
+            def counted(*args, **kwargs):
+                def call():
+                    self._metrics.count_call(endpoint)
+                    return attr(*args, **kwargs)
+
+                return self._limiter.call(endpoint, call, self._metrics)
+
+            return counted
+        if isinstance(attr, PLAIN_TYPES) or name.startswith("_"):
+            return attr
+        return InstrumentedClient(attr, endpoint, self._metrics, self._limiter)
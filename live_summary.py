@@ -0,0 +1,105 @@
+import logging
+import threading
+import time
+
+from config import SLACK_UPDATE_INTERVAL_SECONDS
+from chunking import chunk_text
+
+logger = logging.getLogger(__name__)
+
+PLACEHOLDER = "_Summarizing the conversation..._"
+IN_PROGRESS = "_Still writing..._"
+LINKING = "_Linking next steps to Notion..._"
+FAILED = "_Could not summarize this channel, see the run logs._"
+
+
+class LiveSummaryMessage:
+    """A Slack message that shows a summary while it is being generated.
+
+    `start` posts a placeholder. `update` takes the streamed text so far and
+    re-renders the message with the sections completed up to now, at most once
+    every `min_interval` seconds; updates arriving in between are dropped, as
+    the next one supersedes them. `finish` waits out the interval if needed
+    and writes the final text. The message itself holds the first
+    MAX_CHUNK_SIZE characters; `finish` posts the rest as thread replies.
+    Every started message must be finished, with FAILED if nothing better
+    is available, so it is never left as a placeholder.
+    """
+
+    def __init__(
+        self,
+        slack_fetcher,
+        channel_name: str,
+        header: str = "",
+        min_interval: float = SLACK_UPDATE_INTERVAL_SECONDS,
+    ):
+        self.slack_fetcher = slack_fetcher
+        self.channel_name = channel_name
+        self.header = header
+        self.min_interval = min_interval
+        self.channel_id = None
+        self.ts = None
+        self._shown = None
+        self._last_update = 0.0
+        self.finished = False
+        self._lock = threading.Lock()
+
+    def start(self) -> bool:
+        """Post the placeholder; returns False if it could not be posted."""
+        posted = self.slack_fetcher.send_message_to_channel(
+            self.channel_name, self.header + PLACEHOLDER
+        )
+        if not posted:
+            return False
+        self.channel_id, self.ts = posted
+        self._last_update = time.monotonic()
+        return True
+
+    def update(self, text: str) -> None:
+        """Show the completed sections of a summary that is still streaming."""
+        boundary = text.rfind("\n\n")
+        if boundary == -1:
+            # The first section is still being written
+            return
+        completed = text[:boundary].rstrip()
+        if not completed or completed == self._shown:
+            return
+        with self._lock:
+            if time.monotonic() - self._last_update < self.min_interval:
+                return
+            self._push(completed, f"{completed}\n\n{IN_PROGRESS}")
+
+    def summarized(self, summary: str) -> None:
+        """Show the whole summary while its next steps are being linked.
+
+        Skipped when an update was just sent, so linking is never delayed.
+        """
+        with self._lock:
+            if time.monotonic() - self._last_update < self.min_interval:
+                return
+            self._push(summary, f"{summary}\n\n{LINKING}")
+
+    def finish(self, text: str) -> None:
+        """Replace the message with its final text."""
+        with self._lock:
+            self._wait_for_interval()
+            self._push(text, text)
+            self.finished = True
+        chunks = chunk_text(self.header + text)
+        if len(chunks) > 1:
+            self.slack_fetcher.outbound.send(
+                self.channel_name, "\n".join(chunks[1:]), thread_ts=self.ts
+            )
+
+    def _wait_for_interval(self) -> None:
+        remaining = self.min_interval - (time.monotonic() - self._last_update)
+        if remaining > 0:
+            time.sleep(remaining)
+
+    def _push(self, shown: str, message: str) -> None:
+        chunks = chunk_text(self.header + message)
+        self.slack_fetcher.update_message(
+            self.channel_id, self.ts, chunks[0] if chunks else self.header
+        )
+        self._shown = shown
+        self._last_update = time.monotonic()
@@ -0,0 +1,91 @@
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+from typing import Dict, List, Optional
+
+from cache_utils import load_json, save_json
+from config import LLM_CACHE_DIR, LLM_CACHE_MAX_AGE_HOURS, LLM_CACHE_MAX_ENTRIES
+
+logger = logging.getLogger(__name__)
+
+
+class LLMResponseCache:
+    """Content-addressed cache of model replies, one JSON file per entry.
+
+    Entries are keyed by a hash of the model, messages and request
+    parameters. They expire after `max_age_seconds`, and the oldest entries
+    are evicted once there are more than `max_entries`.
+    """
+
+    def __init__(
+        self,
+        directory: str = LLM_CACHE_DIR,
+        max_age_seconds: float = LLM_CACHE_MAX_AGE_HOURS * 3600,
+        max_entries: int = LLM_CACHE_MAX_ENTRIES,
+    ):
+        self.directory = directory
+        self.max_age_seconds = max_age_seconds
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def key(model: str, messages: List[Dict], **params) -> str:
+        payload = json.dumps(
+            {"model": model, "messages": messages, "params": params}, sort_keys=True
+        )
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, f"{key}.json")
+
+    def get(self, key: str) -> Optional[str]:
+        path = self._path(key)
+        try:
+            age = time.time() - os.path.getmtime(path)
+        except OSError:
+            age = None
+        entry = load_json(path, None) if age is not None else None
+
+        with self._lock:
+            if entry is None or age > self.max_age_seconds:
+                self.misses += 1
+                return None
+            self.hits += 1
+        return entry["content"]
+
+    def put(self, key: str, content: str) -> None:
+        save_json(self._path(key), {"content": content, "created_at": time.time()})
+        self.evict()
+
+    def evict(self) -> None:
+        """Drop expired entries, then the oldest ones beyond `max_entries`."""
+        with self._lock:
+            try:
+                names = [n for n in os.listdir(self.directory) if n.endswith(".json")]
+            except FileNotFoundError:
+                return
+
+            now = time.time()
+            entries = []
+            for name in names:
+                path = os.path.join(self.directory, name)
+                try:
+                    mtime = os.path.getmtime(path)
+                    if now - mtime > self.max_age_seconds:
+                        os.remove(path)
+                    else:
+                        entries.append((mtime, path))
+                except OSError:
+                    continue
+
+            entries.sort()
+            for _, path in entries[: max(0, len(entries) - self.max_entries)]:
+                try:
+                    os.remove(path)
+                except OSError:
+                    continue
@@ -1,7 +1,15 @@
 from slack_client import SlackDataFetcher
 from summarizer import ConversationSummarizer
 from notion_fetcher import NotionDataFetcher
+from message_store import MessageStore
+from step_index import StepIndex
+from rolling_summary import RollingSummarizer
+from live_summary import FAILED, LiveSummaryMessage
+from instrumentation import metrics
+from pipeline import Pipeline
 import logging
+import os
+from typing import Callable, Dict, Optional
 from datetime import datetime, timedelta
 import config
 
@@ -9,94 +17,285 @@ logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 
-def main():
-    try:
-        # Initialize components
-        slack_fetcher = SlackDataFetcher()
-        summarizer = ConversationSummarizer(slack_fetcher.user_map)
+def get_output_dir(channel_name: str) -> str:
+    """Return the outputs directory for a channel.
 
-        # Get messages from the sales-team channel
-        logger.info("Fetching sales team conversations...")
-        conversations = slack_fetcher.organize_conversations()
+    A single configured channel writes straight to `outputs/`; with several
+    channels each one gets its own `outputs/<channel>/` directory.
+    """
+    if len(config.SUMMARY_CHANNELS) == 1:
+        return "outputs"
+    output_dir = os.path.join("outputs", channel_name)
+    os.makedirs(output_dir, exist_ok=True)
+    return output_dir
 
-        if "sales-team" not in conversations:
-            logger.error("Sales-team channel not found or no messages available")
-            return
 
-        # Format conversation for both file and AI
-        formatted_conversation = summarizer._prepare_conversation(
-            conversations["sales-team"]
+def get_summary_channel() -> Optional[str]:
+    """Return the channel summaries are posted to, or None if it is not set."""
+    if config.SEND_TO_TEST_CHANNEL:
+        if not config.SLACK_TEST_CHANNEL:
+            logger.error("Test channel not set in config.py")
+        return config.SLACK_TEST_CHANNEL
+    return "slack-summarization-agent"
+
+
+def summary_header(channel_name: str) -> str:
+    """Prefix identifying the channel when several channels are summarized."""
+    if len(config.SUMMARY_CHANNELS) > 1:
+        return f"*#{channel_name}*\n\n"
+    return ""
+
+
+def write_output(path: str, text: str) -> None:
+    logger.info(f"Writing {path}...")
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(text)
+
+
+def summarize_channel(
+    summarizer: ConversationSummarizer,
+    channel_name: str,
+    messages: list,
+    start_date: str,
+    end_date: str,
+    rolling_summarizer: Optional[RollingSummarizer] = None,
+    write_file: Callable[[str, str], None] = write_output,
+    on_progress: Optional[Callable[[str], None]] = None,
+) -> str:
+    """Summarize one channel's conversation and write its formatted messages.
+
+    With a rolling summarizer, only messages since the channel's last run are
+    sent to the model and merged into its stored rolling summary. Otherwise
+    the summary is streamed to `on_progress` if given.
+    """
+    output_dir = get_output_dir(channel_name)
+
+    # Format conversation for both file and AI
+    formatted_conversation = summarizer._prepare_conversation(messages)
+
+    # Save formatted conversation to file (overwrite mode)
+    write_file(
+        os.path.join(output_dir, "slack_messages.txt"),
+        f"\n=== Channel: {channel_name} ===\n\n{formatted_conversation}",
+    )
+
+    # Summarize using the same formatted conversation
+    logger.info(f"Summarizing {channel_name} conversation...")
+    if rolling_summarizer:
+        window_start_ts = (
+            datetime.now() - timedelta(hours=config.HOURS_DELTA)
+        ).timestamp()
+        return rolling_summarizer.summarize(
+            channel_name, messages, start_date, end_date, window_start_ts
         )
+    return summarizer.summarize_conversation(
+        formatted_conversation, start_date, end_date, on_progress
+    )
+
+
+def link_channel(
+    summarizer: ConversationSummarizer,
+    channel_name: str,
+    channel_summary: str,
+    step_index: StepIndex,
+    write_file: Callable[[str, str], None] = write_output,
+) -> str:
+    """Link a channel summary's next steps to Notion steps and write its outputs."""
+    output_dir = get_output_dir(channel_name)
+
+    logger.info(f"Linking {channel_name} next steps to notion steps...")
+    notion_steps = step_index.candidates_for_summary(channel_summary)
+    linked_steps = summarizer.link_next_steps_to_notion_steps(
+        channel_summary, notion_steps
+    )
 
-        # Save formatted conversation to file (overwrite mode)
-        filename = "outputs/slack_messages.txt"
+    # Save original summary and linked steps for comparison
+    write_file(os.path.join(output_dir, "sales_summary_original.txt"), channel_summary)
+    write_file(os.path.join(output_dir, "linked_steps.txt"), linked_steps)
 
-        logger.info(f"Saving formatted messages to {filename}...")
-        with open(filename, "w", encoding="utf-8") as f:
-            f.write("\n=== Channel: sales-team ===\n\n")
-            f.write(formatted_conversation)
+    # Replace the Next Steps section in channel_summary with linked_steps
+    logger.info("Replacing Next Steps section with linked steps...")
+    sections = channel_summary.split("\n\n")
+    for i, section in enumerate(sections):
+        if section.startswith("*Next Steps:*") or section.startswith("Next Steps:"):
+            sections[i] = linked_steps
+            break
+    channel_summary = "\n\n".join(sections)
 
-        # Get current date range
-        start_date = (datetime.now() - timedelta(hours=24)).strftime("%m/%d %H:%M")
-        end_date = datetime.now().strftime("%m/%d %H:%M")
+    write_file(os.path.join(output_dir, "sales_summary.txt"), channel_summary)
+    return channel_summary
 
-        # Initialize NotionDataFetcher
-        notion_fetcher = NotionDataFetcher()
 
-        # Fetch steps from Notion
+def build_pipeline(
+    slack_fetcher: SlackDataFetcher,
+    summarizer: ConversationSummarizer,
+    rolling_summarizer: Optional[RollingSummarizer] = None,
+    live_messages: Optional[Dict[str, LiveSummaryMessage]] = None,
+) -> Pipeline:
+    """Build the stage graph of one run.
+
+    The Notion fetch does not depend on Slack, so it runs alongside the Slack
+    fetch and the summaries; each channel is linked once both its summary and
+    the step index are ready, and output files are written in the background.
+
+    With STREAM_SUMMARIES, each channel's summary is posted as a placeholder
+    that is updated while the summary streams in and finished with the linked
+    Next Steps; those messages are added to `live_messages` by channel.
+    """
+    if live_messages is None:
+        live_messages = {}
+    summary_channel = get_summary_channel() if config.STREAM_SUMMARIES else None
+    # Room for the Slack and Notion fetches next to LLM_WORKERS channel stages
+    pipeline = Pipeline(max_workers=config.LLM_WORKERS + 2)
+
+    def write_file(path: str, text: str) -> None:
+        pipeline.defer(write_output, path, text)
+
+    # Get current date range
+    start_date = (datetime.now() - timedelta(hours=24)).strftime("%m/%d %H:%M")
+    end_date = datetime.now().strftime("%m/%d %H:%M")
+
+    def fetch_conversations():
+        # Get messages from all configured channels
+        logger.info(
+            f"Fetching conversations for {', '.join(config.SUMMARY_CHANNELS)}..."
+        )
+        return slack_fetcher.organize_conversations(config.SUMMARY_CHANNELS)
+
+    def build_step_index():
         logger.info("Fetching steps from Notion...")
-        notion_steps = notion_fetcher.fetch_step_data()
+        steps = NotionDataFetcher().fetch_steps()
+        with metrics.stage("notion.build_step_index"):
+            return StepIndex(steps)
+
+    pipeline.add("slack", fetch_conversations)
+    pipeline.add("notion", build_step_index)
+
+    for channel_name in config.SUMMARY_CHANNELS:
+
+        def summarize(conversations, channel_name=channel_name):
+            if channel_name not in conversations:
+                return None
+            live = None
+            if summary_channel:
+                live = LiveSummaryMessage(
+                    slack_fetcher, summary_channel, summary_header(channel_name)
+                )
+                if live.start():
+                    live_messages[channel_name] = live
+                else:
+                    live = None
+
+            try:
+                channel_summary = summarize_channel(
+                    summarizer,
+                    channel_name,
+                    conversations[channel_name],
+                    start_date,
+                    end_date,
+                    rolling_summarizer,
+                    write_file,
+                    live.update if live else None,
+                )
+            except Exception:
+                if live:
+                    live.finish(FAILED)
+                raise
+            if live:
+                live.summarized(channel_summary)
+            return channel_summary
+
+        def link(channel_summary, step_index, channel_name=channel_name):
+            if channel_summary is None:
+                return None
+            live = live_messages.get(channel_name)
+            try:
+                linked_summary = link_channel(
+                    summarizer, channel_name, channel_summary, step_index, write_file
+                )
+            except Exception:
+                if live:
+                    live.finish(channel_summary)
+                raise
+            if live:
+                live.finish(linked_summary)
+            return linked_summary
 
-        # Summarize using the same formatted conversation
-        logger.info("Summarizing conversation...")
-        channel_summary = summarizer.summarize_conversation(
-            formatted_conversation, start_date, end_date
+        pipeline.add(f"summarize:{channel_name}", summarize, ["slack"])
+        pipeline.add(
+            f"link:{channel_name}", link, [f"summarize:{channel_name}", "notion"]
         )
 
-        logger.info("Linking next steps to notion steps...")
-        linked_steps = summarizer.link_next_steps_to_notion_steps(
-            channel_summary, notion_steps
+    return pipeline
+
+
+def finish_live_messages(
+    live_messages: Dict[str, LiveSummaryMessage], results: Dict
+) -> None:
+    """Finish streamed messages whose link stage was skipped or failed.
+
+    They show the unlinked summary if there is one, or FAILED.
+    """
+    for channel_name, live in live_messages.items():
+        if not live.finished:
+            live.finish(results.get(f"summarize:{channel_name}") or FAILED)
+
+
+def main():
+    metrics.reset()
+    try:
+        # Initialize components
+        store = (
+            MessageStore()
+            if config.USE_MESSAGE_STORE or config.USE_INGESTED_MESSAGES
+            else None
         )
+        slack_fetcher = SlackDataFetcher(store=store)
+        summarizer = ConversationSummarizer(slack_fetcher.user_map)
+        rolling_summarizer = (
+            RollingSummarizer(summarizer) if config.INCREMENTAL_SUMMARIES else None
+        )
+
+        live_messages = {}
+        pipeline = build_pipeline(
+            slack_fetcher, summarizer, rolling_summarizer, live_messages
+        )
+        results = pipeline.run()
+        finish_live_messages(live_messages, results)
+
+        if "slack" in pipeline.errors:
+            raise pipeline.errors["slack"]
+        if not results["slack"]:
+            logger.error("No configured channel found or no messages available")
+            return
 
-        # Save original summary and linked steps for comparison
-        logger.info("Saving original summary and linked steps before modifications...")
-        with open("outputs/sales_summary_original.txt", "w", encoding="utf-8") as f:
-            f.write(channel_summary)
-        with open("outputs/linked_steps.txt", "w", encoding="utf-8") as f:
-            f.write(linked_steps)
-
-        # Replace the Next Steps section in channel_summary with linked_steps
-        logger.info("Replacing Next Steps section with linked steps...")
-        sections = channel_summary.split("\n\n")
-        for i, section in enumerate(sections):
-            if section.startswith("*Next Steps:*") or section.startswith("Next Steps:"):
-                sections[i] = linked_steps
-                break
-        channel_summary = "\n\n".join(sections)
-
-        logger.info("Writing sales summary to file...")
-        with open("outputs/sales_summary.txt", "w", encoding="utf-8") as f:
-            f.write(channel_summary)
+        # Streamed summaries were already posted and updated in place
+        summaries = {
+            channel_name: results[f"link:{channel_name}"]
+            for channel_name in config.SUMMARY_CHANNELS
+            if results.get(f"link:{channel_name}") and channel_name not in live_messages
+        }
 
         # Send to test channel if enabled, otherwise send to summarization channel
-        logger.info("Sending sales summary to Slack...")
-        if config.SEND_TO_TEST_CHANNEL:
-            if config.SLACK_TEST_CHANNEL:
-                slack_fetcher.send_message_to_channel(
-                    config.SLACK_TEST_CHANNEL, channel_summary
+        summary_channel = get_summary_channel() if summaries else None
+        if summary_channel:
+            # Queue every summary at once; the dispatcher paces the posts
+            sends = {
+                channel_name: slack_fetcher.outbound.submit(
+                    summary_channel, summary_header(channel_name) + channel_summary
                 )
-                logger.info(f"Sales summary sent to {config.SLACK_TEST_CHANNEL}")
-            else:
-                logger.error("Test channel not set in config.py")
-        else:
-            slack_fetcher.send_message_to_channel(
-                "slack-summarization-agent", channel_summary
-            )
-            logger.info("Sales team summary successfully sent!")
+                for channel_name, channel_summary in summaries.items()
+            }
+            logger.info(f"Sending {', '.join(sends)} summaries to Slack...")
+            for channel_name, send in sends.items():
+                if send.result():
+                    logger.info(f"{channel_name} summary sent to {summary_channel}")
 
     except Exception as e:
         logger.error(f"Error in main process: {e}")
         raise
+    finally:
+        metrics.write_report()
 
 
 if __name__ == "__main__":
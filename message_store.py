@@ -0,0 +1,219 @@
+import json
+import logging
+import os
+import sqlite3
+import threading
+from typing import Dict, Iterable, List, Optional
+
+from config import MESSAGE_STORE_PATH
+from models import Message
+
+logger = logging.getLogger(__name__)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS messages (
+    channel_id TEXT NOT NULL,
+    ts TEXT NOT NULL,
+    is_reply INTEGER NOT NULL,
+    thread_ts TEXT NOT NULL DEFAULT '',
+    ts_num REAL NOT NULL,
+    data TEXT NOT NULL,
+    PRIMARY KEY (channel_id, ts, is_reply)
+);
+CREATE INDEX IF NOT EXISTS idx_messages_window
+    ON messages (channel_id, is_reply, ts_num);
+CREATE INDEX IF NOT EXISTS idx_messages_thread
+    ON messages (channel_id, thread_ts);
+CREATE TABLE IF NOT EXISTS watermarks (
+    channel_id TEXT PRIMARY KEY,
+    latest_ts TEXT NOT NULL
+);
+"""
+
+
+class MessageStore:
+    """SQLite store of processed Slack messages with per-channel watermarks.
+
+    Top-level messages and thread replies are keyed by channel and `ts`
+    (a broadcast reply can appear as both). The watermark is the newest
+    top-level `ts` that ingestion.py has received as an event, i.e. how
+    current the ingested messages are; history syncs re-read the whole
+    window and neither read nor set it.
+    """
+
+    def __init__(self, path: str = MESSAGE_STORE_PATH):
+        self.path = path
+        if path != ":memory:" and os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.executescript(SCHEMA)
+
+    def close(self) -> None:
+        self._conn.close()
+
+    def get_watermark(self, channel_id: str) -> Optional[str]:
+        """Return the newest ingested top-level message `ts` for a channel."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT latest_ts FROM watermarks WHERE channel_id = ?", (channel_id,)
+            ).fetchone()
+        return row[0] if row else None
+
+    def set_watermark(self, channel_id: str, latest_ts: str) -> None:
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT INTO watermarks (channel_id, latest_ts) VALUES (?, ?) "
+                "ON CONFLICT(channel_id) DO UPDATE SET latest_ts = excluded.latest_ts",
+                (channel_id, latest_ts),
+            )
+
+    def upsert_messages(self, channel_id: str, messages: List[Message]) -> None:
+        """Insert or replace processed top-level messages."""
+        rows = [self._row(channel_id, msg, is_reply=False) for msg in messages]
+        with self._lock, self._conn:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO messages VALUES (?, ?, ?, ?, ?, ?)", rows
+            )
+
+    def replace_thread_replies(
+        self, channel_id: str, thread_ts: str, replies: List[Message]
+    ) -> None:
+        """Replace the stored replies of a thread, picking up edits and deletes."""
+        rows = [self._row(channel_id, reply, is_reply=True) for reply in replies]
+        with self._lock, self._conn:
+            self._conn.execute(
+                "DELETE FROM messages WHERE channel_id = ? AND is_reply = 1 "
+                "AND thread_ts = ?",
+                (channel_id, thread_ts),
+            )
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO messages VALUES (?, ?, ?, ?, ?, ?)", rows
+            )
+
+    def upsert_replies(self, channel_id: str, replies: List[Message]) -> None:
+        """Insert or replace individual thread replies.
+
+        The parent message, if stored, is marked as the start of the thread
+        so `get_window` attaches the replies to it.
+        """
+        rows = [self._row(channel_id, reply, is_reply=True) for reply in replies]
+        with self._lock, self._conn:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO messages VALUES (?, ?, ?, ?, ?, ?)", rows
+            )
+            self._conn.executemany(
+                "UPDATE messages SET thread_ts = ?, "
+                "data = json_set(data, '$.thread_ts', ?) "
+                "WHERE channel_id = ? AND ts = ? AND is_reply = 0 AND thread_ts = ''",
+                [
+                    (reply.thread_ts, reply.thread_ts, channel_id, reply.thread_ts)
+                    for reply in replies
+                ],
+            )
+
+    def delete_missing(
+        self, channel_id: str, start_ts: float, end_ts: float, keep: Iterable[str]
+    ) -> int:
+        """Delete top-level messages in (start_ts, end_ts] whose `ts` is not in `keep`.
+
+        Used after re-reading a window's history, so messages deleted in Slack
+        leave the store; their thread replies are deleted with them.
+        """
+        keep = set(keep)
+        with self._lock, self._conn:
+            rows = self._conn.execute(
+                "SELECT ts FROM messages WHERE channel_id = ? AND is_reply = 0 "
+                "AND ts_num > ? AND ts_num <= ?",
+                (channel_id, start_ts, end_ts),
+            ).fetchall()
+            deleted = [(channel_id, ts) for (ts,) in rows if ts not in keep]
+            self._conn.executemany(
+                "DELETE FROM messages WHERE channel_id = ? AND is_reply = 0 "
+                "AND ts = ?",
+                deleted,
+            )
+            self._conn.executemany(
+                "DELETE FROM messages WHERE channel_id = ? AND is_reply = 1 "
+                "AND thread_ts = ?",
+                deleted,
+            )
+        return len(deleted)
+
+    def delete_message(self, channel_id: str, ts: str) -> int:
+        """Delete a message (and its copy as a thread reply, if any)."""
+        with self._lock, self._conn:
+            cursor = self._conn.execute(
+                "DELETE FROM messages WHERE channel_id = ? AND ts = ?", (channel_id, ts)
+            )
+        return cursor.rowcount
+
+    def latest_replies(self, channel_id: str) -> Dict[str, float]:
+        """Return the newest stored reply `ts` of each thread in a channel."""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT thread_ts, MAX(ts_num) FROM messages WHERE channel_id = ? "
+                "AND is_reply = 1 GROUP BY thread_ts",
+                (channel_id,),
+            ).fetchall()
+        return dict(rows)
+
+    def active_threads(self, channel_id: str, since_ts: float) -> List[str]:
+        """Return thread_ts values whose parent or latest reply is newer than `since_ts`."""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT thread_ts FROM messages WHERE channel_id = ? "
+                "AND thread_ts != '' GROUP BY thread_ts HAVING MAX(ts_num) >= ?",
+                (channel_id, since_ts),
+            ).fetchall()
+        return [row[0] for row in rows]
+
+    def get_window(
+        self, channel_id: str, start_ts: float, end_ts: float
+    ) -> List[Message]:
+        """Return processed messages in the window, newest first, with replies attached."""
+        with self._lock:
+            parents = self._conn.execute(
+                "SELECT data FROM messages WHERE channel_id = ? AND is_reply = 0 "
+                "AND ts_num >= ? AND ts_num <= ? ORDER BY ts_num DESC",
+                (channel_id, start_ts, end_ts),
+            ).fetchall()
+            replies = self._conn.execute(
+                "SELECT data FROM messages WHERE channel_id = ? AND is_reply = 1 "
+                "AND ts_num >= ? AND ts_num <= ? ORDER BY ts_num ASC",
+                (channel_id, start_ts, end_ts),
+            ).fetchall()
+
+        replies_by_thread = {}
+        for (data,) in replies:
+            reply = Message.from_dict(json.loads(data), channel_id)
+            replies_by_thread.setdefault(reply.thread_ts, []).append(reply)
+
+        messages = []
+        for (data,) in parents:
+            msg = Message.from_dict(json.loads(data), channel_id)
+            thread_replies = replies_by_thread.get(msg.thread_ts)
+            if thread_replies:
+                msg.thread_replies = thread_replies
+            messages.append(msg)
+        return messages
+
+    def prune(self, channel_id: str, before_ts: float) -> int:
+        """Delete messages older than `before_ts`; returns the number removed."""
+        with self._lock, self._conn:
+            cursor = self._conn.execute(
+                "DELETE FROM messages WHERE channel_id = ? AND ts_num < ?",
+                (channel_id, before_ts),
+            )
+        return cursor.rowcount
+
+    @staticmethod
+    def _row(channel_id: str, msg: Message, is_reply: bool) -> tuple:
+        return (
+            channel_id,
+            msg.timestamp,
+            int(is_reply),
+            msg.thread_ts,
+            float(msg.timestamp),
+            json.dumps(msg.to_dict()),
+        )
@@ -0,0 +1,99 @@
+import sys
+from dataclasses import dataclass
+from typing import Dict, Optional, Sequence, Tuple
+
+# Replace 'yourworkspace' with your actual Slack workspace domain
+MESSAGE_URL_BASE = "https://yourworkspace.slack.com/archives"
+
+
+def message_url(channel_id: str, timestamp: str) -> str:
+    """Generate a direct URL to a Slack message."""
+    return f"{MESSAGE_URL_BASE}/{channel_id}/p{timestamp.replace('.', '')}"
+
+
+@dataclass(frozen=True, slots=True)
+class FileRef:
+    """A shared file, reduced to what the prompt shows of it."""
+
+    name: str
+    url_private: str
+
+    @classmethod
+    def from_slack(cls, file: Dict) -> "FileRef":
+        return cls(file.get("name", "Unnamed file"), file.get("url_private", "No URL"))
+
+
+@dataclass(slots=True)
+class Message:
+    """A processed Slack message or thread reply.
+
+    Only the fields `_prepare_conversation` formats are kept: raw Slack file
+    objects are reduced to FileRefs, and user names, user/channel IDs and
+    thread timestamps are interned, as they repeat across many messages. The
+    permalink is derived from the channel ID and timestamp when needed.
+    """
+
+    text: str
+    timestamp: str
+    user: str
+    user_id: str
+    channel_id: str
+    thread_ts: str = ""
+    files: Tuple[FileRef, ...] = ()
+    thread_replies: Sequence["Message"] = ()
+
+    def __post_init__(self):
+        self.user = sys.intern(self.user)
+        self.user_id = sys.intern(self.user_id)
+        self.channel_id = sys.intern(self.channel_id)
+        self.thread_ts = sys.intern(self.thread_ts)
+
+    @property
+    def message_url(self) -> str:
+        return message_url(self.channel_id, self.timestamp)
+
+    @classmethod
+    def from_slack(cls, message: Dict, channel_id: str, username: str) -> "Message":
+        """Build a record from a raw Slack message or event."""
+        return cls(
+            text=message.get("text", ""),
+            timestamp=message.get("ts", ""),
+            user=username,
+            user_id=message.get("user", ""),
+            channel_id=channel_id,
+            thread_ts=message.get("thread_ts", ""),
+            files=_file_refs(message.get("files")),
+        )
+
+    def to_dict(self) -> Dict:
+        """JSON-serializable form, without the channel ID or thread replies."""
+        return {
+            "text": self.text,
+            "timestamp": self.timestamp,
+            "user": self.user,
+            "user_id": self.user_id,
+            "thread_ts": self.thread_ts,
+            "files": [
+                {"name": file.name, "url_private": file.url_private}
+                for file in self.files
+            ],
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict, channel_id: str) -> "Message":
+        """Inverse of `to_dict`; also reads rows stored with raw Slack files."""
+        return cls(
+            text=data.get("text", ""),
+            timestamp=data.get("timestamp", ""),
+            user=data.get("user", "Unknown User"),
+            user_id=data.get("user_id", ""),
+            channel_id=channel_id,
+            thread_ts=data.get("thread_ts", ""),
+            files=_file_refs(data.get("files")),
+        )
+
+
+def _file_refs(files: Optional[Sequence]) -> Tuple[FileRef, ...]:
+    if not files:
+        return ()
+    return tuple(FileRef.from_slack(file) for file in files if isinstance(file, dict))
@@ -1,160 +1,265 @@
-from notion_client import Client
+import clients
+from page_cache import PageContentCache
+from instrumentation import InstrumentedClient, timed
 import config
+from concurrent.futures import ThreadPoolExecutor
+
+# Block types whose rich text is included in page content
+TEXT_BLOCK_TYPES = {
+    "paragraph",
+    "heading_1",
+    "heading_2",
+    "heading_3",
+    "bulleted_list_item",
+    "numbered_list_item",
+    "to_do",
+    "toggle",
+    "quote",
+    "callout",
+}
+
+# Blocks whose children are rendered into the page content. Children of other
+# types (tables, synced blocks, child pages...) are never read, so not fetched.
+NESTED_BLOCK_TYPES = TEXT_BLOCK_TYPES | {"column_list", "column"}
+
+
+def format_step(step):
+    """Format one step from `load_step_graph` with its processes and SOPs."""
+    formatted_step = [f"Step: {step['name']}\nURL: {step['url']}"]
+
+    # Format and append process and SOP data
+    for process in step["processes"]:
+        formatted_step.append(f"Process: {process['name']}")
+        if process["body_content"]:
+            formatted_step.append(process["body_content"])
+
+    # Modified to format SOPs more cleanly
+    for sop in step["sops"]:
+        formatted_step.append(f"SOP: {sop['name']}")
+        if sop["body_content"]:
+            formatted_step.append(sop["body_content"])
+    formatted_step.append("-" * 50)  # Add separator between steps
+
+    return "\n".join(formatted_step)
+
+
+def format_steps(steps):
+    return "\n".join(format_step(step) for step in steps)
 
 
 class NotionDataFetcher:
-    def __init__(self):
-        self.client = Client(auth=config.NOTION_API_KEY)
+    def __init__(self, client=None, page_cache=None):
+        self.client = InstrumentedClient(
+            client or clients.notion_api_client(), "notion"
+        )
+        self.page_cache = page_cache or PageContentCache()
 
-    def fetch_step_data(self):
-        try:
-            response = self.client.databases.query(
-                database_id=config.NOTION_STEPS_DATABASE_ID,
-                sorts=[
-                    {"property": "Process", "direction": "ascending"},
-                    {"property": "Name", "direction": "descending"},
-                ],
+    def _query_all(self, database_id, **kwargs):
+        """Return every page in a database, following pagination."""
+        from notion_client.helpers import iterate_paginated_api
+
+        return list(
+            iterate_paginated_api(
+                self.client.databases.query, database_id=database_id, **kwargs
+            )
+        )
+
+    def _title(self, page):
+        """Return the plain text of a page's Name property, or None if empty."""
+        title_array = page.get("properties", {}).get("Name", {}).get("title", [])
+        if not title_array:
+            return None
+        return title_array[0].get("text", {}).get("content")
+
+    def _relation_ids(self, page, property_name):
+        """Return the related page IDs of a relation property.
+
+        Query results only inline the first 25 relations, so longer relations
+        are read through the page property endpoint.
+        """
+        from notion_client.helpers import iterate_paginated_api
+
+        prop = page.get("properties", {}).get(property_name, {})
+        if not prop.get("has_more"):
+            return [related["id"] for related in prop.get("relation", [])]
+        items = iterate_paginated_api(
+            self.client.pages.properties.retrieve,
+            page_id=page["id"],
+            property_id=prop["id"],
+        )
+        return [item["relation"]["id"] for item in items]
+
+    @timed("notion.load_step_graph")
+    def load_step_graph(self):
+        """Load steps with their linked processes and SOPs.
+
+        The Steps, Processes and SOPs databases are each paged through once
+        and joined in memory on their relation properties, so the number of
+        database queries does not grow with the number of steps.
+        """
+        steps = self._query_all(
+            config.NOTION_STEPS_DATABASE_ID,
+            sorts=[
+                {"property": "Process", "direction": "ascending"},
+                {"property": "Name", "direction": "descending"},
+            ],
+        )
+        processes = self._query_all(config.NOTION_PROCESSES_DATABASE_ID)
+        sops = self._query_all(config.NOTION_SOP_DATABASE_ID)
+
+        graph = []
+        for step in steps:
+            name = self._title(step)
+            if not name:
+                print("Skipping step with empty name")
+                continue
+
+            step_id = step["id"]
+            graph.append(
+                {
+                    "id": step_id,
+                    "name": name,
+                    "url": f"https://notion.so/{step_id.replace('-', '')}",
+                    "processes": [],
+                    "sops": [],
+                }
             )
 
-            # Format steps into text
-            formatted_steps = []
-            for result in response["results"]:
-                try:
-                    # Safely get the name property
-                    name_property = result.get("properties", {}).get("Name", {})
-                    title_array = name_property.get("title", [])
-                    if not title_array:
-                        print("Skipping step with empty name")
-                        continue
-
-                    name = title_array[0].get("text", {}).get("content", "Unnamed Step")
-                    id = result["id"]
-                    # Construct the Notion URL for the step
-                    step_url = f"https://notion.so/{id.replace('-', '')}"
-                    formatted_steps.append(f"Step: {name}\nURL: {step_url}")
-
-                    # Call fetch_process_data and fetch_sop_data for each step
-                    processes = self.fetch_process_data(id)
-                    sops = self.fetch_sop_data(id)
-
-                    # Format and append process and SOP data
-                    for process in processes:
-                        formatted_steps.append(f"Process: {process['name']}")
-                        if process["body_content"]:
-                            formatted_steps.append(process["body_content"])
-
-                    # Modified to format SOPs more cleanly
-                    for sop in sops:
-                        formatted_steps.append(f"SOP: {sop['name']}")
-                        if sop["body_content"]:
-                            formatted_steps.append(sop["body_content"])
-                    formatted_steps.append("-" * 50)  # Add separator between steps
-
-                except (KeyError, IndexError) as e:
-                    print(f"Error processing step: {e}")
-                    continue
+        steps_by_id = {step["id"]: step for step in graph}
+        self._attach_related(steps_by_id, processes, "Steps", "processes")
+        self._attach_related(steps_by_id, sops, "Associated Steps", "sops")
+        self.page_cache.save()
+        return graph
+
+    def _attach_related(self, steps_by_id, pages, property_name, key):
+        """Append {"name", "body_content"} entries to the steps each page relates to.
+
+        Each page body is fetched once, however many steps it is linked to, and
+        only if it is linked to at least one loaded step.
+        """
+        for page in pages:
+            step_ids = [
+                step_id
+                for step_id in self._relation_ids(page, property_name)
+                if step_id in steps_by_id
+            ]
+            name = self._title(page)
+            if not step_ids or not name:
+                continue
+            body_content = self.get_page_content(
+                page["id"], page.get("last_edited_time")
+            )
+            entry = {"name": name, "body_content": body_content}
+            for step_id in step_ids:
+                steps_by_id[step_id][key].append(entry)
+
+    def fetch_steps(self):
+        """Load the step graph and write its text form to outputs/notion_steps.txt."""
+        try:
+            steps = self.load_step_graph()
 
             # Join all steps and write to file
-            output_text = "\n".join(formatted_steps)
             with open("outputs/notion_steps.txt", "w", encoding="utf-8") as f:
-                f.write(output_text)
+                f.write(format_steps(steps))
 
-            return output_text
+            return steps
 
         except Exception as e:
             print(f"Error fetching from Notion: {e}")
-            return ""  # Return empty string on error
-
-    def fetch_process_data(self, step_id):
-        # Query the Notion Processes database
-        response = self.client.databases.query(
-            **{
-                "database_id": config.NOTION_PROCESSES_DATABASE_ID,
-                "filter": {"property": "Steps", "relation": {"contains": step_id}},
-            }
-        )
-        # Extract name and body content
-        processes = []
-        for result in response["results"]:
-            name = result["properties"]["Name"]["title"][0]["text"]["content"]
-            page_id = result["id"]
-            body_content = self.get_page_content(page_id)
-            processes.append({"name": name, "body_content": body_content})
-        return processes
-
-    def fetch_sop_data(self, step_id):
-        # Query the Notion SOPs database
-        response = self.client.databases.query(
-            **{
-                "database_id": config.NOTION_SOP_DATABASE_ID,
-                "filter": {
-                    "property": "Associated Steps",
-                    "relation": {"contains": step_id},
-                },
-            }
+            return []  # Return no steps on error
+
+    def fetch_step_data(self):
+        return format_steps(self.fetch_steps())
+
+    def _list_children(self, block_id):
+        """Return all direct children of a block, following pagination."""
+        from notion_client.helpers import iterate_paginated_api
+
+        return list(
+            iterate_paginated_api(self.client.blocks.children.list, block_id=block_id)
         )
-        # Extract name and body content
-        sops = []
-        for result in response["results"]:
-            name = result["properties"]["Name"]["title"][0]["text"]["content"]
-            page_id = result["id"]
-            body_content = self.get_page_content(page_id)
-            sops.append({"name": name, "body_content": body_content})
-        return sops
+
+    def fetch_block_tree(self, page_id):
+        """Fetch every block under a page, breadth-first.
+
+        Each level of the tree is requested concurrently (up to
+        NOTION_BLOCK_WORKERS at once), so wall time follows the depth of the
+        tree rather than its size. Children are attached to their parent
+        under a "children" key, in document order. Only blocks whose children
+        are rendered (NESTED_BLOCK_TYPES) are expanded.
+        """
+        root = {"id": page_id}
+        level = [root]
+        with ThreadPoolExecutor(max_workers=config.NOTION_BLOCK_WORKERS) as executor:
+            while level:
+                children_lists = executor.map(
+                    lambda block: self._list_children(block["id"]), level
+                )
+                next_level = []
+                for parent, children in zip(level, children_lists):
+                    parent["children"] = children
+                    next_level.extend(
+                        child
+                        for child in children
+                        if child.get("has_children")
+                        and child["type"] in NESTED_BLOCK_TYPES
+                    )
+                level = next_level
+        return root["children"]
 
     def extract_block_content(self, block):
-        """Helper function to extract text content from different block types"""
+        """Helper function to extract text content from different block types
+
+        Expects children to already be attached by `fetch_block_tree`. Nested
+        content (toggles, list items, columns...) follows its parent line.
+        """
         block_type = block["type"]
 
         if block_type not in block:
             return ""
 
-        text_content = []
-        rich_text = []
+        children = block.get("children", [])
 
         if block_type == "column_list":
-            # Handle column lists by recursively processing each column
-            columns = self.client.blocks.children.list(block_id=block["id"]).get(
-                "results", []
+            # Columns are flattened onto one line, as they sit side by side
+            return " ".join(
+                filter(
+                    None, (self.extract_block_content(column) for column in children)
+                )
             )
-            for column in columns:
-                # Get content within each column
-                column_blocks = self.client.blocks.children.list(
-                    block_id=column["id"]
-                ).get("results", [])
-                for col_block in column_blocks:
-                    col_content = self.extract_block_content(col_block)
-                    if col_content:
-                        text_content.append(col_content)
-        elif block_type == "paragraph":
-            rich_text = block["paragraph"]["rich_text"]
-        elif block_type == "heading_1":
-            rich_text = block["heading_1"]["rich_text"]
-        elif block_type == "heading_2":
-            rich_text = block["heading_2"]["rich_text"]
-        elif block_type == "heading_3":
-            rich_text = block["heading_3"]["rich_text"]
-        elif block_type == "bulleted_list_item":
-            rich_text = block["bulleted_list_item"]["rich_text"]
-        elif block_type == "numbered_list_item":
-            rich_text = block["numbered_list_item"]["rich_text"]
-        else:
+        if block_type == "column":
+            return " ".join(
+                filter(None, (self.extract_block_content(child) for child in children))
+            )
+        if block_type not in TEXT_BLOCK_TYPES:
             return ""
 
-        # Process rich text if it's a text block type
-        if block_type != "column_list":
-            for text in rich_text:
-                if text.get("type") == "text":
-                    text_content.append(text.get("text", {}).get("content", ""))
+        text_content = [
+            text.get("text", {}).get("content", "")
+            for text in block[block_type].get("rich_text", [])
+            if text.get("type") == "text"
+        ]
+        lines = [" ".join(text_content)]
+        for child in children:
+            lines.append(self.extract_block_content(child))
+        return "\n".join(filter(None, lines))
+
+    def get_page_content(self, page_id, last_edited_time=None):
+        """Helper function to get all content from a page
 
-        return " ".join(text_content)
+        Bodies are served from the page cache while the page's
+        `last_edited_time` is unchanged.
+        """
+        content = self.page_cache.get(page_id, last_edited_time)
+        if content is None:
+            content = self._fetch_page_content(page_id)
+            self.page_cache.put(page_id, last_edited_time, content)
+        return content
 
-    def get_page_content(self, page_id):
-        """Helper function to get all content from a page"""
-        blocks = self.client.blocks.children.list(block_id=page_id)
+    def _fetch_page_content(self, page_id):
         content = []
 
-        for block in blocks.get("results", []):
+        for block in self.fetch_block_tree(page_id):
             text = self.extract_block_content(block)
             if text:
                 content.append(text)
@@ -0,0 +1,155 @@
+import logging
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Dict, Optional, Tuple
+
+from slack_sdk.errors import SlackApiError
+
+from chunking import chunk_text
+from config import OUTBOUND_WORKERS, SLACK_POST_INTERVAL_SECONDS
+
+logger = logging.getLogger(__name__)
+
+
+class Pacer:
+    """Spaces events at least `interval` seconds apart across threads."""
+
+    def __init__(self, interval: float):
+        self.interval = interval
+        self._next = 0.0
+        self._lock = threading.Lock()
+
+    def wait(self) -> None:
+        with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next)
+            self._next = slot + self.interval
+        if slot > now:
+            time.sleep(slot - now)
+
+
+class OutboundDispatcher:
+    """Queue of Slack posts shared by every producer in the process.
+
+    Each message is split into chunks that fit MAX_CHUNK_SIZE; the first is
+    posted to the channel and the rest as replies in its thread. Messages to
+    the same channel go out in submission order, one post per
+    `channel_interval`, while different channels are sent in parallel. The
+    workspace-wide limit and retries of rate-limited posts are left to the
+    client's rate limiter (see rate_limiter.py).
+    """
+
+    def __init__(
+        self,
+        client,
+        channel_index,
+        channel_interval: float = SLACK_POST_INTERVAL_SECONDS,
+        max_workers: int = OUTBOUND_WORKERS,
+    ):
+        self.client = client
+        self.channel_index = channel_index
+        self.channel_interval = channel_interval
+        self.max_workers = max(1, max_workers)
+        self._executor = None
+        self._lock = threading.Lock()
+        self._queues: Dict[str, deque] = {}
+        self._active = set()
+        self._channel_pacers: Dict[str, Pacer] = {}
+
+    def submit(
+        self, channel_name: str, message: str, thread_ts: Optional[str] = None
+    ) -> Future:
+        """Queue a message for posting and return a future of its result.
+
+        The future resolves to the channel ID and `ts` of the first post, or
+        None if it could not be sent. With `thread_ts`, every chunk is posted
+        as a reply in that thread.
+        """
+        future = Future()
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self.max_workers, thread_name_prefix="outbound"
+                )
+            self._queues.setdefault(channel_name, deque()).append(
+                (message, thread_ts, future)
+            )
+            if channel_name not in self._active:
+                self._active.add(channel_name)
+                self._executor.submit(self._drain, channel_name)
+        return future
+
+    def send(
+        self, channel_name: str, message: str, thread_ts: Optional[str] = None
+    ) -> Optional[Tuple[str, str]]:
+        """Queue a message and wait until it has been posted."""
+        return self.submit(channel_name, message, thread_ts).result()
+
+    def close(self) -> None:
+        """Wait for queued messages and stop the worker threads."""
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor:
+            executor.shutdown(wait=True)
+
+    def _drain(self, channel_name: str) -> None:
+        """Send a channel's queued messages in order until its queue is empty."""
+        while True:
+            with self._lock:
+                queue = self._queues[channel_name]
+                if not queue:
+                    self._active.discard(channel_name)
+                    return
+                message, thread_ts, future = queue.popleft()
+            try:
+                future.set_result(self._send(channel_name, message, thread_ts))
+            except Exception as e:
+                logger.error(f"Error sending message to {channel_name}: {e}")
+                future.set_result(None)
+
+    def _send(
+        self, channel_name: str, message: str, thread_ts: Optional[str]
+    ) -> Optional[Tuple[str, str]]:
+        channel_id = self.channel_index.lookup(channel_name)
+        if not channel_id:
+            logger.error(f"Channel {channel_name} not found")
+            return None
+
+        first = None
+        for chunk in chunk_text(message) or [message]:
+            try:
+                response = self._post(channel_id, chunk, thread_ts)
+            except SlackApiError as e:
+                if first or e.response.get("error") != "channel_not_found":
+                    raise
+                # The cached ID is stale; rebuild the index and retry once
+                self.channel_index.invalidate(channel_name)
+                channel_id = self.channel_index.lookup(channel_name)
+                if not channel_id:
+                    logger.error(f"Channel {channel_name} not found")
+                    return None
+                response = self._post(channel_id, chunk, thread_ts)
+
+            if not response["ok"]:
+                logger.error(f"Error sending message: {response['error']}")
+                return first
+            if first is None:
+                first = (channel_id, response["ts"])
+                # Continuation chunks go into the thread of the first post
+                thread_ts = thread_ts or response["ts"]
+        return first
+
+    def _channel_pacer(self, channel_id: str) -> Pacer:
+        with self._lock:
+            pacer = self._channel_pacers.get(channel_id)
+            if pacer is None:
+                pacer = self._channel_pacers[channel_id] = Pacer(self.channel_interval)
+            return pacer
+
+    def _post(self, channel_id: str, text: str, thread_ts: Optional[str]):
+        """Post one chunk, at most one per `channel_interval` in each channel."""
+        self._channel_pacer(channel_id).wait()
+        kwargs = {"thread_ts": thread_ts} if thread_ts else {}
+        return self.client.chat_postMessage(channel=channel_id, text=text, **kwargs)
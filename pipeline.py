@@ -0,0 +1,126 @@
+import logging
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Any, Callable, Dict, List, Sequence
+
+from instrumentation import metrics
+
+logger = logging.getLogger(__name__)
+
+
+class Pipeline:
+    """Runs named stages as a dependency graph, starting each as soon as it can.
+
+    A stage function is called with the results of its dependencies as
+    positional arguments, in the order they were declared. If a stage fails,
+    its error is logged and kept in `errors`, and every stage depending on it
+    is skipped. Side effects that nothing waits for, such as writing output
+    files, can be handed to `defer` to keep them off the critical path.
+    """
+
+    def __init__(self, max_workers: int = 4):
+        self.max_workers = max_workers
+        self.stages: Dict[str, Dict] = {}
+        self.results: Dict[str, Any] = {}
+        self.errors: Dict[str, Exception] = {}
+        self.timings: Dict[str, Dict[str, float]] = {}
+        self._deferred = []
+        self._deferred_lock = threading.Lock()
+        self._executor = None
+
+    def add(self, name: str, func: Callable, depends_on: Sequence[str] = ()) -> None:
+        if name in self.stages:
+            raise ValueError(f"Duplicate pipeline stage: {name}")
+        missing = [dep for dep in depends_on if dep not in self.stages]
+        if missing:
+            raise ValueError(f"Stage {name} depends on unknown stages: {missing}")
+        self.stages[name] = {"func": func, "depends_on": list(depends_on)}
+
+    def defer(self, func: Callable, *args, **kwargs) -> None:
+        """Run `func` in the background; `run` waits for it before returning."""
+        if self._executor is None:
+            func(*args, **kwargs)
+            return
+        with self._deferred_lock:
+            self._deferred.append(self._executor.submit(func, *args, **kwargs))
+
+    def _run_stage(self, name: str) -> Any:
+        stage = self.stages[name]
+        args = [self.results[dep] for dep in stage["depends_on"]]
+        start = time.perf_counter()
+        try:
+            with metrics.stage(f"pipeline.{name}"):
+                return stage["func"](*args)
+        finally:
+            self.timings[name]["start"] = start
+            self.timings[name]["end"] = time.perf_counter()
+
+    def run(self) -> Dict[str, Any]:
+        """Run every stage and return the results of those that succeeded."""
+        pending = dict(self.stages)
+        running = {}
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            self._executor = executor
+            try:
+                while pending or running:
+                    for name, stage in list(pending.items()):
+                        if any(dep in self.errors for dep in stage["depends_on"]):
+                            logger.warning(
+                                f"Skipping stage {name}: a dependency failed"
+                            )
+                            self.errors[name] = RuntimeError("dependency failed")
+                            del pending[name]
+                        elif all(dep in self.results for dep in stage["depends_on"]):
+                            self.timings[name] = {}
+                            running[executor.submit(self._run_stage, name)] = name
+                            del pending[name]
+                    if not running:
+                        break
+
+                    done, _ = wait(running, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        name = running.pop(future)
+                        try:
+                            self.results[name] = future.result()
+                        except Exception as e:
+                            logger.error(f"Stage {name} failed: {e}")
+                            self.errors[name] = e
+            finally:
+                # Deferred work may itself defer more, so drain until empty
+                while self._deferred:
+                    with self._deferred_lock:
+                        deferred, self._deferred = self._deferred, []
+                    for future in deferred:
+                        try:
+                            future.result()
+                        except Exception as e:
+                            logger.error(f"Deferred pipeline task failed: {e}")
+                self._executor = None
+
+        metrics.record_critical_path(self.critical_path())
+        return self.results
+
+    def critical_path(self) -> List[Dict[str, float]]:
+        """Return the chain of stages that determined the pipeline's finish time.
+
+        Starting from the stage that finished last, each step goes back to the
+        dependency that finished last, i.e. the one the stage waited on.
+        """
+        finished = {
+            name: timing for name, timing in self.timings.items() if "end" in timing
+        }
+        if not finished:
+            return []
+
+        path = []
+        name = max(finished, key=lambda n: finished[n]["end"])
+        while name:
+            timing = finished[name]
+            path.append(
+                {"stage": name, "seconds": round(timing["end"] - timing["start"], 3)}
+            )
+            deps = [d for d in self.stages[name]["depends_on"] if d in finished]
+            name = max(deps, key=lambda d: finished[d]["end"]) if deps else None
+        path.reverse()
+        return path
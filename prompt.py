@@ -67,3 +67,71 @@ Instructions:
 Conversation:
 {conversation}
 """
+
+
+def merge_sales_summaries_prompt(summaries, start_date, end_date):
+    """Prompt for merging partial executive summaries of one conversation."""
+    partial_summaries = "\n\n".join(
+        f"Partial Summary {i}:\n{summary}" for i, summary in enumerate(summaries, 1)
+    )
+    return f"""
+You are combining partial executive summaries of a single Slack conversation from the sales team channel. Each partial summary covers a consecutive slice of the same conversation.
+
+Merge them into one summary in exactly this format:
+
+Executive Summary ({start_date} - {end_date})
+---
+
+Strategic Initiatives:
+- [Initiative] (Owner: @[Name], Context: [Brief context]) <message_url|View Thread>
+
+Next Steps:
+- [Action Item] (Assigned to: @[Name], Related to: [Strategic Initiative]) <message_url|View Thread>
+
+Brainstorm Ideas:
+- [Idea] (Proposed by: @[Name], Context: [Brief context]) <message_url|View Thread>
+
+Key Links:
+- <url|description_of_link>
+
+Instructions:
+0. Not following the format exactly will cause human harm.
+1. Combine items that describe the same initiative, action or idea into one bullet, keeping the most complete context.
+2. Keep every <message_url|View Thread> link exactly as it appears in the partial summaries; never invent or alter a URL.
+3. Keep the @ mentions exactly as they appear in the partial summaries.
+4. Only include substantive items that provide value to leadership.
+
+{partial_summaries}
+"""
+
+
+def get_sales_summary_delta_prompt(conversation):
+    """Prompt for summarizing only the newest messages of the sales team channel."""
+    return f"""
+You are analyzing the newest messages of a Slack conversation from the sales team channel. An executive summary of the earlier messages already exists; your task is to list only the items that these new messages add.
+
+Respond in exactly this format:
+
+Strategic Initiatives:
+- [Initiative] (Owner: @[Name], Context: [Brief context]) <message_url|View Thread>
+
+Next Steps:
+- [Action Item] (Assigned to: @[Name], Related to: [Strategic Initiative]) <message_url|View Thread>
+
+Brainstorm Ideas:
+- [Idea] (Proposed by: @[Name], Context: [Brief context]) <message_url|View Thread>
+
+Key Links:
+- <url|description_of_link>
+
+Instructions:
+0. Not following the format exactly will cause human harm.
+1. Always use @ when mentioning team members (e.g., @Miles, @Busch)
+2. Include hyperlinks to source messages using Slack's format: <url|View Thread>
+3. If a section has no new items, write "- None" under it.
+4. Only include substantive items that provide value to leadership
+5. If you list the wrong person who is repsonsible for something, or link the wrong message to a bullet point it could cost our business millions of dollars and will be very bad.
+
+New Messages:
+{conversation}
+"""
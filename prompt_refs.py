@@ -0,0 +1,125 @@
+import logging
+import re
+from typing import Dict
+
+from instrumentation import metrics
+from tokens import estimate_tokens
+
+logger = logging.getLogger(__name__)
+
+MESSAGE_URL = re.compile(r" \[Message URL\]: (\S+)")
+FILE_SHARED = re.compile(r"^\[File shared\] (.*) - \[Link\]\((.*)\)$")
+LINK_SHARED = re.compile(r"^\[Link shared\] (\S+)$")
+STEP_URL = re.compile(r"^URL: (\S+)$", re.MULTILINE)
+SLACK_LINK = re.compile(r"<(https?://[^|>\s]+)\|([^>]*)>")
+# Entries that tell the model nothing: joins/leaves and placeholders for
+# files or links without a URL
+NOISE = re.compile(
+    r"has (?:joined|left) the channel$|^\[Link shared\] No URL$|\[Link\]\(No URL\)$"
+)
+
+# Models sometimes keep the brackets, e.g. <[m12]|View Thread>
+REF_LINK = re.compile(r"<\[?([mfus]\d+)\]?\|([^>]*)>")
+BARE_REF = re.compile(r"\[([mfus]\d+)\]")
+
+INSTRUCTIONS = """
+URLs in this prompt are replaced by short reference IDs in square brackets,
+such as [m12] for a message, [f3] for a file, [u4] for a shared link and
+[s5] for a Notion step. Wherever the format asks for a URL, write the
+reference ID instead, e.g. <m12|View Thread>.
+"""
+
+
+class PromptRefs:
+    """Short reference IDs standing in for the URLs of one prompt.
+
+    Slack permalinks, file links, shared links and Notion step URLs are
+    replaced by IDs like [m12] before a prompt is sent, and `expand` turns the
+    IDs in the model's reply back into Slack links.
+    """
+
+    def __init__(self):
+        self.urls: Dict[str, str] = {}
+        self._refs: Dict[str, str] = {}
+        self._counts: Dict[str, int] = {}
+
+    def ref(self, url: str, kind: str) -> str:
+        """Return the reference ID of `url`, assigning a new one if needed."""
+        ref = self._refs.get(url)
+        if ref is None:
+            self._counts[kind] = self._counts.get(kind, 0) + 1
+            ref = f"{kind}{self._counts[kind]}"
+            self._refs[url] = ref
+            self.urls[ref] = url
+        return ref
+
+    def compact_conversation(self, conversation: str) -> str:
+        """Replace URLs in a prepared conversation and drop noise entries."""
+        parts = conversation.split("\n\n")
+        compacted = []
+        for i, part in enumerate(parts):
+            text = MESSAGE_URL.sub("", part)
+            starts_thread = i + 1 < len(parts) and parts[i + 1] == "[Thread started]"
+            if NOISE.search(text.strip()) and not starts_thread:
+                continue
+            if part == "[End of thread]" and compacted[-1:] == ["[Thread started]"]:
+                compacted.pop()
+                continue
+
+            part = MESSAGE_URL.sub(lambda m: f" [{self.ref(m.group(1), 'm')}]", part)
+            file_shared = FILE_SHARED.match(part)
+            if file_shared:
+                name, url = file_shared.groups()
+                part = f"[File shared] {name} [{self.ref(url, 'f')}]"
+            link_shared = LINK_SHARED.match(part)
+            if link_shared:
+                part = f"[Link shared] [{self.ref(link_shared.group(1), 'u')}]"
+            compacted.append(part)
+
+        text = "\n\n".join(compacted)
+        self.report("conversation", conversation, text)
+        return text
+
+    def compact_links(self, text: str) -> str:
+        """Replace the URLs of Slack-style <url|label> links, e.g. in a summary."""
+
+        def replace(match):
+            url, label = match.groups()
+            kind = "m" if "slack.com/archives/" in url else "u"
+            return f"<{self.ref(url, kind)}|{label}>"
+
+        return SLACK_LINK.sub(replace, text)
+
+    def compact_steps(self, steps: str) -> str:
+        """Replace the URL line of each formatted Notion step."""
+        return STEP_URL.sub(lambda m: f"URL: [{self.ref(m.group(1), 's')}]", steps)
+
+    def expand(self, text: str) -> str:
+        """Turn reference IDs in a model reply back into Slack links."""
+
+        def expand_link(match):
+            ref, label = match.groups()
+            url = self.urls.get(ref)
+            return f"<{url}|{label}>" if url else match.group(0)
+
+        def expand_bare(match):
+            ref = match.group(1)
+            url = self.urls.get(ref)
+            if not url:
+                return match.group(0)
+            return f"<{url}|View Thread>" if ref.startswith("m") else f"<{url}>"
+
+        return BARE_REF.sub(expand_bare, REF_LINK.sub(expand_link, text))
+
+    def report(self, name: str, before: str, after: str) -> None:
+        """Log and count the token savings of compacting `before` into `after`."""
+        before_tokens = estimate_tokens(before)
+        after_tokens = estimate_tokens(after)
+        metrics.increment("prompt_refs.tokens_before", before_tokens)
+        metrics.increment("prompt_refs.tokens_after", after_tokens)
+        if before_tokens:
+            logger.info(
+                f"Compacted {name}: ~{before_tokens} -> ~{after_tokens} tokens "
+                f"({after_tokens / before_tokens:.0%} of original, "
+                f"{len(self.urls)} references)"
+            )
@@ -0,0 +1,228 @@
+import logging
+import random
+import threading
+import time
+from collections import deque
+from typing import Any, Callable, Dict, Optional
+
+from config import API_RATE_LIMITS, RATE_LIMIT_MAX_RETRIES
+
+logger = logging.getLogger(__name__)
+
+# Slack rate limits apply per method tier; methods not listed here are Tier 3.
+# chat.postMessage has its own limit (about one post per second per channel,
+# which OutboundDispatcher paces) with workspace-wide bursts.
+SLACK_TIERS = {
+    "conversations_list": "tier2",
+    "conversations_history": "tier3",
+    "conversations_replies": "tier3",
+    "chat_update": "tier3",
+    "users_info": "tier4",
+    "chat_postMessage": "chat_postMessage",
+}
+
+# The rate is halved on every 429 and grows by this fraction per success
+RATE_DECREASE = 0.5
+RATE_INCREASE = 0.02
+MIN_RATE = 0.2
+# Backoff for rate-limited responses without a Retry-After, and for
+# transient errors
+BASE_BACKOFF_SECONDS = 0.5
+
+# Tiers whose SDK retries are turned off (see clients.openai_client), so the
+# limiter also retries their timeouts, conflicts, 5xx and connection errors
+TRANSIENT_RETRY_TIERS = {"openai"}
+TRANSIENT_STATUSES = {408, 409}
+
+
+def tier_of(endpoint: str) -> str:
+    """Return the rate-limit tier of a dotted endpoint, e.g. "slack.tier3".
+
+    Notion and OpenAI limit requests per integration and per API key, so
+    each of them is a single tier.
+    """
+    api, _, method = endpoint.partition(".")
+    if api == "slack":
+        return f"slack.{SLACK_TIERS.get(method, 'tier3')}"
+    return api
+
+
+def _status(error: Exception) -> Optional[int]:
+    response = getattr(error, "response", None)
+    return (
+        getattr(error, "status", None)
+        or getattr(error, "status_code", None)
+        or getattr(response, "status_code", None)
+    )
+
+
+def is_transient(error: Exception) -> bool:
+    """Whether an API error is worth retrying: a timeout, 409, 5xx or lost connection.
+
+    Connection errors are recognised by class name (OpenAI's
+    APIConnectionError and its APITimeoutError subclass), so the SDK need
+    not be imported here.
+    """
+    if any(cls.__name__ == "APIConnectionError" for cls in type(error).__mro__):
+        return True
+    status = _status(error)
+    return isinstance(status, int) and (status in TRANSIENT_STATUSES or status >= 500)
+
+
+def retry_after_seconds(error: Exception) -> Optional[float]:
+    """Return the Retry-After of a rate-limited API error, else None.
+
+    Understands Slack's SlackApiError, Notion's APIResponseError and OpenAI's
+    RateLimitError. Returns 0 when the response was rate limited but gave no
+    usable Retry-After.
+    """
+    response = getattr(error, "response", None)
+    status = _status(error)
+    slack_error = response.get("error") if hasattr(response, "get") else None
+    if (
+        status != 429
+        and getattr(error, "code", None) != "rate_limited"
+        and slack_error != "ratelimited"
+    ):
+        return None
+
+    headers = getattr(error, "headers", None) or getattr(response, "headers", None)
+    headers = {key.lower(): value for key, value in (headers or {}).items()}
+    try:
+        if "retry-after-ms" in headers:
+            return float(headers["retry-after-ms"]) / 1000
+        return float(headers.get("retry-after", 0))
+    except ValueError:
+        return 0.0
+
+
+class TokenBucket:
+    """Adaptive token bucket for one rate-limit tier.
+
+    With a `ceiling` (requests per second), calls are spaced to that rate
+    with bursts of up to one second's worth. Without one, calls are not
+    delayed until the first 429, after which the bucket runs at half the
+    rate observed over the last second. Each 429 halves the rate and pauses
+    the bucket for the Retry-After; each success raises the rate by
+    RATE_INCREASE, up to the ceiling.
+    """
+
+    def __init__(self, ceiling: Optional[float] = None):
+        self.ceiling = ceiling
+        self.rate = ceiling
+        self._tat = 0.0  # theoretical arrival time of the next call
+        self._paused_until = 0.0
+        self._recent = deque()
+        self._lock = threading.Lock()
+
+    def acquire(self) -> float:
+        """Wait for a slot and return the seconds waited."""
+        with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._paused_until)
+            if self.rate is not None:
+                interval = 1 / self.rate
+                # Up to one second's worth of calls may go out back to back
+                burst = (max(self.rate, 1) - 1) * interval
+                tat = max(self._tat, slot)
+                slot = max(slot, tat - burst)
+                self._tat = tat + interval
+            self._recent.append(slot)
+            while self._recent and self._recent[0] < slot - 1:
+                self._recent.popleft()
+        if slot > now:
+            time.sleep(slot - now)
+        return max(0.0, slot - now)
+
+    def throttled(self, retry_after: float) -> None:
+        """Slow down after a 429 and pause for its Retry-After."""
+        with self._lock:
+            now = time.monotonic()
+            # 429s of calls that were in flight when the bucket last slowed
+            # down arrive during its pause and do not slow it further
+            if now >= self._paused_until:
+                observed = len([t for t in self._recent if t >= now - 1])
+                current = self.rate if self.rate is not None else max(observed, 1)
+                self.rate = max(MIN_RATE, current * RATE_DECREASE)
+            self._paused_until = max(self._paused_until, now + retry_after)
+            self._tat = max(self._tat, self._paused_until)
+
+    def succeeded(self) -> None:
+        with self._lock:
+            if self.rate is None:
+                return
+            rate = self.rate * (1 + RATE_INCREASE)
+            self.rate = min(rate, self.ceiling) if self.ceiling else rate
+
+
+class RateLimiter:
+    """Token buckets per API tier, shared by every client in the process.
+
+    `call` waits for the endpoint's bucket, and retries rate-limited calls
+    after their Retry-After plus random jitter (so waiting callers do not
+    retry in lockstep), up to `max_retries` times. In TRANSIENT_RETRY_TIERS,
+    transient errors are retried too, with exponential backoff and without
+    slowing the bucket. Time spent waiting is reported to the run metrics.
+    """
+
+    def __init__(
+        self,
+        ceilings: Optional[Dict[str, float]] = None,
+        max_retries: int = RATE_LIMIT_MAX_RETRIES,
+    ):
+        self.ceilings = API_RATE_LIMITS if ceilings is None else ceilings
+        self.max_retries = max_retries
+        self._buckets: Dict[str, TokenBucket] = {}
+        self._lock = threading.Lock()
+
+    def bucket(self, tier: str) -> TokenBucket:
+        with self._lock:
+            bucket = self._buckets.get(tier)
+            if bucket is None:
+                bucket = self._buckets[tier] = TokenBucket(self.ceilings.get(tier))
+            return bucket
+
+    def call(self, endpoint: str, func: Callable[[], Any], run_metrics) -> Any:
+        """Call `func` within the limits of `endpoint`'s tier."""
+        tier = tier_of(endpoint)
+        bucket = self.bucket(tier)
+        for attempt in range(self.max_retries + 1):
+            waited = bucket.acquire()
+            if waited:
+                run_metrics.record_throttle(tier, waited)
+            try:
+                result = func()
+            except Exception as e:
+                if attempt == self.max_retries:
+                    raise
+                retry_after = retry_after_seconds(e)
+                if retry_after is not None:
+                    delay = retry_after or BASE_BACKOFF_SECONDS * 2**attempt
+                    bucket.throttled(delay)
+                    jitter = random.uniform(0, 0.1 + 0.25 * delay)
+                    logger.warning(
+                        f"Rate limited on {endpoint}, retrying in {delay + jitter:.1f}s"
+                    )
+                    run_metrics.count_retry(endpoint)
+                    run_metrics.increment(f"rate_limited.{tier}")
+                    time.sleep(jitter)
+                    run_metrics.record_throttle(tier, jitter)
+                    continue
+                if tier in TRANSIENT_RETRY_TIERS and is_transient(e):
+                    delay = BASE_BACKOFF_SECONDS * 2**attempt
+                    delay += random.uniform(0, 0.25 * delay)
+                    logger.warning(f"{e} on {endpoint}, retrying in {delay:.1f}s")
+                    run_metrics.count_retry(endpoint)
+                    time.sleep(delay)
+                    continue
+                raise
+            bucket.succeeded()
+            return result
+
+    def reset(self) -> None:
+        """Forget learned rates, e.g. between benchmark runs."""
+        with self._lock:
+            self._buckets.clear()
+
+
+rate_limiter = RateLimiter()
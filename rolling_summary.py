@@ -0,0 +1,183 @@
+import logging
+import os
+import re
+import time
+from dataclasses import replace
+from typing import Dict, List
+
+from cache_utils import load_json, save_json
+from config import ROLLING_SUMMARY_DIR, ROLLING_SUMMARY_MAX_BULLETS
+from instrumentation import metrics
+from models import Message
+from prompt import get_sales_summary_delta_prompt
+
+logger = logging.getLogger(__name__)
+
+SECTIONS = ["Strategic Initiatives", "Next Steps", "Brainstorm Ideas", "Key Links"]
+SECTION_HEADER = re.compile(r"^\*?(" + "|".join(SECTIONS) + r"):\*?\s*$", re.MULTILINE)
+# Slack permalinks end in /p<ts without the dot>
+PERMALINK_TS = re.compile(r"/p(\d{10})(\d{6})")
+
+
+def parse_sections(summary: str, default_ts: float) -> Dict[str, List[Dict]]:
+    """Parse summary bullets into {section: [{"text", "ts"}]}.
+
+    Each bullet is dated by the newest Slack permalink it cites, so it can
+    age out of the rolling window; bullets without one use `default_ts`.
+    """
+    sections = {name: [] for name in SECTIONS}
+    current = None
+    for line in summary.split("\n"):
+        header = SECTION_HEADER.match(line.strip())
+        if header:
+            current = header.group(1)
+            continue
+        stripped = line.strip()
+        if current is None or not stripped.startswith(("-", "•")):
+            continue
+        if stripped.lstrip("-• ").strip().lower() in ("none", "none."):
+            continue
+        cited = [float(f"{s}.{us}") for s, us in PERMALINK_TS.findall(stripped)]
+        sections[current].append(
+            {"text": stripped, "ts": max(cited) if cited else default_ts}
+        )
+    return sections
+
+
+def render_summary(sections: Dict[str, List[Dict]], start_date: str, end_date: str):
+    """Render sections in the same layout as get_sales_summary_prompt asks for."""
+    parts = [f"Executive Summary ({start_date} - {end_date})\n---"]
+    for name in SECTIONS:
+        bullets = [bullet["text"] for bullet in sections.get(name, [])]
+        parts.append("\n".join([f"{name}:"] + bullets))
+    return "\n\n".join(parts)
+
+
+def _normalize(text: str) -> str:
+    return re.sub(r"\W+", " ", text.lower()).strip()
+
+
+class RollingSummarizer:
+    """Keeps a rolling daily summary per channel, updated from hourly deltas.
+
+    Each run summarizes only the messages and replies newer than the
+    channel's checkpoint into a delta, merges the delta bullets into the
+    stored state and drops bullets whose sources left the window. The full
+    summary pass runs only on the first run or once the merged state grows
+    past `max_bullets`.
+    """
+
+    def __init__(
+        self,
+        summarizer,
+        state_dir: str = ROLLING_SUMMARY_DIR,
+        max_bullets: int = ROLLING_SUMMARY_MAX_BULLETS,
+    ):
+        self.summarizer = summarizer
+        self.state_dir = state_dir
+        self.max_bullets = max_bullets
+
+    def _state_path(self, channel_name: str) -> str:
+        return os.path.join(self.state_dir, f"{channel_name}.json")
+
+    def summarize(
+        self,
+        channel_name: str,
+        messages: List[Message],
+        start_date: str,
+        end_date: str,
+        window_start_ts: float,
+    ) -> str:
+        """Return the channel's summary for the window, updating its state."""
+        state = load_json(self._state_path(channel_name), None)
+        newest_ts = self._newest_ts(messages)
+
+        if state is None or state["checkpoint_ts"] < window_start_ts:
+            return self._full_pass(
+                channel_name, messages, start_date, end_date, newest_ts
+            )
+
+        new_messages = self._messages_since(messages, state["checkpoint_ts"])
+        sections = {
+            name: [
+                b for b in state["sections"].get(name, []) if b["ts"] >= window_start_ts
+            ]
+            for name in SECTIONS
+        }
+
+        if new_messages:
+            conversation = self.summarizer._prepare_conversation(new_messages)
+            logger.info(
+                f"Summarizing {len(new_messages)} new messages for {channel_name}"
+            )
+            with metrics.stage("llm.summarize_delta"):
+                delta = self.summarizer._complete(
+                    get_sales_summary_delta_prompt(conversation)
+                )
+            self._merge(sections, parse_sections(delta, newest_ts))
+
+        if sum(len(bullets) for bullets in sections.values()) > self.max_bullets:
+            logger.info(f"Rolling summary for {channel_name} too large, rebuilding")
+            return self._full_pass(
+                channel_name, messages, start_date, end_date, newest_ts
+            )
+
+        self._save(channel_name, max(newest_ts, state["checkpoint_ts"]), sections)
+        return self.summarizer.format_for_slack(
+            render_summary(sections, start_date, end_date)
+        )
+
+    def _full_pass(self, channel_name, messages, start_date, end_date, newest_ts):
+        logger.info(f"Running full summary pass for {channel_name}")
+        conversation = self.summarizer._prepare_conversation(messages)
+        summary = self.summarizer.summarize_conversation(
+            conversation, start_date, end_date
+        )
+        if not summary.startswith("Error summarizing conversation"):
+            self._save(channel_name, newest_ts, parse_sections(summary, newest_ts))
+        return summary
+
+    def _merge(self, sections: Dict[str, List[Dict]], delta: Dict[str, List[Dict]]):
+        for name in SECTIONS:
+            seen = {_normalize(bullet["text"]) for bullet in sections[name]}
+            for bullet in delta[name]:
+                if _normalize(bullet["text"]) not in seen:
+                    sections[name].append(bullet)
+                    seen.add(_normalize(bullet["text"]))
+
+    def _save(self, channel_name: str, checkpoint_ts: float, sections: Dict) -> None:
+        save_json(
+            self._state_path(channel_name),
+            {
+                "checkpoint_ts": checkpoint_ts,
+                "updated_at": time.time(),
+                "sections": sections,
+            },
+        )
+
+    @staticmethod
+    def _newest_ts(messages: List[Message]) -> float:
+        timestamps = [
+            float(item.timestamp)
+            for msg in messages
+            for item in [msg, *msg.thread_replies]
+            if item.timestamp
+        ]
+        return max(timestamps, default=time.time())
+
+    @staticmethod
+    def _messages_since(messages: List[Message], checkpoint_ts: float) -> List[Message]:
+        """Messages newer than the checkpoint, plus older threads with new replies.
+
+        An older parent is kept for context but carries only its new replies.
+        """
+        new_messages = []
+        for msg in messages:
+            new_replies = [
+                reply
+                for reply in msg.thread_replies
+                if float(reply.timestamp) > checkpoint_ts
+            ]
+            if float(msg.timestamp) > checkpoint_ts or new_replies:
+                new_messages.append(replace(msg, thread_replies=new_replies))
+        return new_messages
@@ -1,204 +1,444 @@
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
 import pytz
 import logging
 from slack_sdk import WebClient
 from slack_sdk.errors import SlackApiError
-from typing import List, Dict
-from config import SLACK_BOT_TOKEN, EST, START_DATE, END_DATE
+from slack_sdk.http_retry import ConnectionErrorRetryHandler
+from typing import Callable, List, Dict, Iterable, Iterator, Optional, Tuple
+from config import (
+    EST,
+    THREAD_REPLY_WORKERS,
+    CHANNEL_FETCH_WORKERS,
+    SUMMARY_CHANNELS,
+    SLACK_PAGE_SIZE,
+    HOURS_DELTA,
+    STORE_THREAD_REFRESH_HOURS,
+    USE_INGESTED_MESSAGES,
+    EXCLUDE_ARCHIVED,
+)
+import clients
+from channel_index import ChannelIndex
+from message_store import MessageStore
+from models import Message, message_url
+from outbound import OutboundDispatcher
+from user_directory import UserDirectory
+from instrumentation import InstrumentedClient, metrics, timed
 import urllib.parse
+from urllib.error import URLError
 
 logger = logging.getLogger(__name__)
 
 
-class SlackDataFetcher:
-    def __init__(self):
-        self.client = WebClient(token=SLACK_BOT_TOKEN)
-        self.user_map = self._get_user_info()
+class CountingConnectionErrorRetryHandler(ConnectionErrorRetryHandler):
+    """Slack's default connection-error retries, counted in the run metrics."""
 
-    def _get_user_info(self) -> Dict[str, str]:
-        """Fetch and cache user ID to username mapping."""
-        user_map = {}
-        try:
-            response = self.client.users_list()
-            for user in response["members"]:
-                name = user.get("profile", {}).get("display_name") or user.get(
-                    "profile", {}
-                ).get("real_name", "Unknown User")
-                user_map[user["id"]] = name
-            return user_map
-        except SlackApiError as e:
-            logger.error(f"Error fetching user info: {e}")
-            return {}
+    def prepare_for_next_attempt(self, *, state, request, response=None, error=None):
+        metrics.count_retry(f"slack.{request.url.rsplit('/', 1)[-1]}")
+        super().prepare_for_next_attempt(
+            state=state, request=request, response=response, error=error
+        )
 
-    def _generate_message_url(self, channel_id: str, timestamp: str) -> str:
-        """Generate a direct URL to a Slack message."""
-        base_url = "https://yourworkspace.slack.com/archives"
-        # Replace 'yourworkspace' with your actual Slack workspace domain
 
-        ts_formatted = timestamp.replace(".", "")
-        message_url = f"{base_url}/{channel_id}/p{ts_formatted}"
-        return message_url
+class PooledWebClient(WebClient):
+    """`WebClient` that sends requests over a pooled httpx client.
 
-    def organize_conversations(self) -> Dict[str, List[Dict]]:
-        """Fetch and organize conversations from sales-team channel only."""
-        conversations = {}
+    The stock client opens a new urllib connection, with a new TLS
+    handshake, for every API call. Here only the transport is replaced:
+    request building, retry handlers and response parsing stay the SDK's.
+    Error statuses such as 429 are returned like successful responses and
+    raised as SlackApiError by the SDK; connection errors are re-raised as
+    URLError so connection-error retry handlers still apply. Clients with a
+    proxy or custom SSL context fall back to urllib.
+    """
+
+    def __init__(self, http_client, **kwargs):
+        super().__init__(**kwargs)
+        self.http_client = http_client
 
+    def _perform_urllib_http_request_internal(self, url: str, req) -> Dict:
+        import httpx
+
+        if self.proxy is not None or self.ssl is not None:
+            return super()._perform_urllib_http_request_internal(url, req)
         try:
-            result = self.client.conversations_list(
-                types="public_channel", exclude_archived=True
+            response = self.http_client.request(
+                req.get_method(),
+                url,
+                content=req.data,
+                headers=dict(req.header_items()),
+                timeout=self.timeout,
             )
+        except httpx.TransportError as e:
+            raise URLError(e) from e
+
+        if response.headers.get("content-type", "").startswith("application/gzip"):
+            body = response.content
+        else:
+            body = response.text
+        return {
+            "status": response.status_code,
+            "headers": response.headers,
+            "body": body,
+        }
 
-            if not result["ok"]:
-                logger.error(f"Error fetching channel list: {result['error']}")
-                return conversations
 
-            channels = result.get("channels", [])
+class SlackDataFetcher:
+    def __init__(
+        self,
+        client: Optional[WebClient] = None,
+        max_reply_workers: int = THREAD_REPLY_WORKERS,
+        store: Optional[MessageStore] = None,
+        channel_index: Optional[ChannelIndex] = None,
+        use_ingested_messages: bool = USE_INGESTED_MESSAGES,
+    ):
+        self.client = InstrumentedClient(client or clients.slack_web_client(), "slack")
+        self.max_reply_workers = max(1, max_reply_workers)
+        self.store = store
+        self.use_ingested_messages = use_ingested_messages
+        self.user_map = UserDirectory(self.client)
+        self.channel_index = channel_index or ChannelIndex(self._iter_channels)
+        self.outbound = OutboundDispatcher(self.client, self.channel_index)
+
+    def _paginate(
+        self, api_method: Callable, result_key: str, strict: bool = False, **kwargs
+    ) -> Iterator[List[Dict]]:
+        """Yield one page of `result_key` items at a time, following next_cursor.
+
+        A failed page ends the iteration, or raises SlackApiError with
+        `strict` for callers that must know they saw every page.
+        """
+        kwargs.setdefault("limit", SLACK_PAGE_SIZE)
+        cursor = None
+        while True:
+            if cursor:
+                kwargs["cursor"] = cursor
+            response = api_method(**kwargs)
+            if not response["ok"]:
+                if strict:
+                    raise SlackApiError(f"Error paging {result_key}", response)
+                logger.error(f"Error paging {result_key}: {response.get('error')}")
+                return
 
-            # Find sales-team channel
-            for channel in channels:
-                if channel["name"] == "sales-team":
-                    channel_id = channel["id"]
+            yield response.get(result_key, [])
 
-                    try:
-                        messages = self.get_channel_messages(channel_id)
-                        if messages:
-                            conversations["sales-team"] = messages
-                    except SlackApiError as e:
-                        logger.error(
-                            f"Error fetching messages for sales-team channel: {e}"
-                        )
-                    break
+            cursor = (response.get("response_metadata") or {}).get("next_cursor")
+            if not cursor:
+                return
 
+    def _iter_channels(self) -> Iterator[List[Dict]]:
+        """Yield pages of public, unarchived channels."""
+        return self._paginate(
+            self.client.conversations_list,
+            "channels",
+            types="public_channel",
+            exclude_archived=EXCLUDE_ARCHIVED,
+        )
+
+    @timed("slack.organize_conversations")
+    def organize_conversations(
+        self, channel_names: Optional[List[str]] = None
+    ) -> Dict[str, List[Message]]:
+        """Fetch and organize conversations from the configured channels.
+
+        Channels are fetched concurrently (up to CHANNEL_FETCH_WORKERS at once)
+        and share this fetcher's user map. Channels that are missing or have no
+        messages in the window are left out of the result.
+        """
+        channel_names = channel_names or SUMMARY_CHANNELS
+        conversations = {}
+
+        try:
+            channel_ids = self.channel_index.lookup_many(channel_names)
         except SlackApiError as e:
             logger.error(f"Error fetching channels: {e}")
+            return conversations
+
+        for channel_name in channel_names:
+            if channel_name not in channel_ids:
+                logger.error(f"Channel {channel_name} not found")
+
+        if not channel_ids:
+            return conversations
+
+        workers = min(CHANNEL_FETCH_WORKERS, len(channel_ids))
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            futures = {
+                channel_name: executor.submit(self._fetch_channel, channel_id)
+                for channel_name, channel_id in channel_ids.items()
+            }
+            for channel_name in channel_names:
+                if channel_name not in futures:
+                    continue
+                try:
+                    messages = futures[channel_name].result()
+                    if messages:
+                        conversations[channel_name] = messages
+                except SlackApiError as e:
+                    logger.error(
+                        f"Error fetching messages for {channel_name} channel: {e}"
+                    )
 
         return conversations
 
-    def get_channel_messages(self, channel_id: str) -> List[Dict]:
+    def _fetch_channel(self, channel_id: str) -> List[Message]:
+        """Fetch one channel's window, through the message store if there is one.
+
+        With `use_ingested_messages`, the store is kept current by the
+        ingestion daemon and is read without calling Slack.
+        """
+        if self.store and self.use_ingested_messages:
+            return self.store.get_window(channel_id, *self._time_window())
+        if self.store:
+            return self.get_stored_channel_messages(channel_id)
+        return self.get_channel_messages(channel_id)
+
+    def get_channel_messages(self, channel_id: str) -> List[Message]:
         """Fetch messages from a channel with proper time window."""
         messages = []
         try:
-            now = datetime.now(EST)
-            start_time = now - timedelta(hours=24)
+            for page in self.iter_channel_messages(channel_id):
+                messages.extend(page)
+            return messages
 
-            logger.info(f"=== Time Window ===")
-            logger.info(f"Start: {start_time.strftime('%Y-%m-%d %H:%M:%S %Z')}")
-            logger.info(f"End: {now.strftime('%Y-%m-%d %H:%M:%S %Z')}")
+        except SlackApiError as e:
+            logger.error(f"Error fetching channel messages: {e}")
+            return []
 
-            start_ts = start_time.timestamp()
-            end_ts = now.timestamp()
+    def _time_window(self) -> Tuple[float, float]:
+        """Return the (start, end) timestamps of the summary window."""
+        now = datetime.now(EST)
+        start_time = now - timedelta(hours=HOURS_DELTA)
 
-            response = self.client.conversations_history(
-                channel=channel_id, oldest=str(start_ts), latest=str(end_ts), limit=1000
-            )
+        logger.info(f"=== Time Window ===")
+        logger.info(f"Start: {start_time.strftime('%Y-%m-%d %H:%M:%S %Z')}")
+        logger.info(f"End: {now.strftime('%Y-%m-%d %H:%M:%S %Z')}")
+
+        return start_time.timestamp(), now.timestamp()
 
-            if response["ok"]:
-                raw_messages = response["messages"]
-                logger.info(f"Retrieved {len(raw_messages)} messages from channel")
+    def get_stored_channel_messages(self, channel_id: str) -> List[Message]:
+        """Sync a channel into the message store and return the stored window."""
+        start_ts, end_ts = self._time_window()
+        try:
+            self.sync_channel(channel_id, start_ts, end_ts)
+        except SlackApiError as e:
+            logger.error(f"Error syncing channel {channel_id}, using stored data: {e}")
+        return self.store.get_window(channel_id, start_ts, end_ts)
+
+    def sync_channel(self, channel_id: str, start_ts: float, end_ts: float) -> None:
+        """Sync the window into the message store, refetching only changed threads.
+
+        Top-level history for the whole window is re-read (one call per page),
+        which picks up edited and deleted parents and each thread's
+        `latest_reply`.
+        Replies are refetched for threads whose `latest_reply` is newer than
+        the newest stored reply, so late replies to old threads are not
+        missed, plus threads with recent activity so that edited replies are
+        picked up.
+        """
+        stored_replies = self.store.latest_replies(channel_id)
+
+        seen_ts = []
+        changed_threads = []
+        # Strict, as messages missing from the history are deleted below
+        pages = self._paginate(
+            self.client.conversations_history,
+            "messages",
+            strict=True,
+            channel=channel_id,
+            oldest=str(start_ts),
+            latest=str(end_ts),
+        )
+        for raw_messages in pages:
+            logger.info(f"Retrieved {len(raw_messages)} messages from channel")
+            self.user_map.resolve(msg.get("user") for msg in raw_messages)
+            self.store.upsert_messages(
+                channel_id,
+                [
+                    self._process_message_content(msg, channel_id)
+                    for msg in raw_messages
+                ],
+            )
+            for msg in raw_messages:
+                seen_ts.append(msg["ts"])
+                if self._has_new_replies(msg, stored_replies, start_ts):
+                    changed_threads.append(msg["thread_ts"])
+
+        deleted = self.store.delete_missing(channel_id, start_ts, end_ts, seen_ts)
+        if deleted:
+            logger.info(f"Removed {deleted} messages deleted from channel")
+
+        refresh_since = end_ts - STORE_THREAD_REFRESH_HOURS * 3600
+        threads = changed_threads + self.store.active_threads(
+            channel_id, max(start_ts, refresh_since)
+        )
+        replies_by_thread = self.get_thread_replies_concurrently(
+            channel_id, threads, start_ts, end_ts
+        )
+        for thread_ts, thread_replies in replies_by_thread.items():
+            # An empty result may be a failed request; keep what is stored
+            if thread_replies:
+                self.store.replace_thread_replies(channel_id, thread_ts, thread_replies)
+
+        self.store.prune(channel_id, start_ts)
+        logger.info(
+            f"Synced channel {channel_id}: refreshed {len(replies_by_thread)} threads"
+        )
+
+    @staticmethod
+    def _has_new_replies(
+        message: Dict, stored_replies: Dict[str, float], start_ts: float
+    ) -> bool:
+        """Whether a history message starts a thread with replies not yet stored."""
+        thread_ts = message.get("thread_ts")
+        if not thread_ts:
+            return False
+        latest_reply = message.get("latest_reply")
+        if latest_reply is None:
+            return thread_ts not in stored_replies
+        latest_reply = float(latest_reply)
+        return latest_reply >= start_ts and latest_reply > stored_replies.get(
+            thread_ts, 0
+        )
+
+    def iter_channel_messages(self, channel_id: str) -> Iterator[List[Message]]:
+        """Yield processed messages one history page at a time.
+
+        Thread replies are fetched for each page before it is yielded, so
+        callers can consume a long window without holding all of it in memory.
+        """
+        start_ts, end_ts = self._time_window()
+
+        # Strict, as messages missing from the history are deleted below
+        pages = self._paginate(
+            self.client.conversations_history,
+            "messages",
+            strict=True,
+            channel=channel_id,
+            oldest=str(start_ts),
+            latest=str(end_ts),
+        )
+        for raw_messages in pages:
+            logger.info(f"Retrieved {len(raw_messages)} messages from channel")
+            self.user_map.resolve(msg.get("user") for msg in raw_messages)
+
+            replies_by_thread = self.get_thread_replies_concurrently(
+                channel_id,
+                [msg["thread_ts"] for msg in raw_messages if msg.get("thread_ts")],
+                start_ts,
+                end_ts,
+            )
 
-                for msg in raw_messages:
-                    processed_msg = self._process_message_content(msg, channel_id)
+            page = []
+            for msg in raw_messages:
+                processed_msg = self._process_message_content(msg, channel_id)
 
-                    if msg.get("thread_ts"):
-                        thread_replies = self.get_thread_replies(
-                            channel_id, msg["thread_ts"], start_ts, end_ts
+                if msg.get("thread_ts"):
+                    thread_replies = replies_by_thread.get(msg["thread_ts"], [])
+                    if thread_replies:
+                        processed_msg.thread_replies = thread_replies
+                        logger.info(
+                            f"Found {len(thread_replies)} replies in thread {msg['thread_ts']}"
                         )
-                        if thread_replies:
-                            processed_msg["thread_replies"] = thread_replies
-                            logger.info(
-                                f"Found {len(thread_replies)} replies in thread {msg['thread_ts']}"
-                            )
 
-                    messages.append(processed_msg)
+                page.append(processed_msg)
 
-            return messages
+            yield page
 
-        except SlackApiError as e:
-            logger.error(f"Error fetching channel messages: {e}")
-            return []
+    def get_thread_replies_concurrently(
+        self,
+        channel_id: str,
+        thread_timestamps: Iterable[str],
+        start_ts: float,
+        end_ts: float,
+    ) -> Dict[str, List[Message]]:
+        """Fetch replies for several threads in parallel, keyed by thread_ts.
+
+        Uses up to ``max_reply_workers`` concurrent requests. A thread that fails
+        maps to an empty list so the remaining threads are still returned.
+        """
+        thread_timestamps = list(dict.fromkeys(thread_timestamps))
+        if not thread_timestamps:
+            return {}
+
+        workers = min(self.max_reply_workers, len(thread_timestamps))
+        replies_by_thread = {}
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            futures = {
+                thread_ts: executor.submit(
+                    self.get_thread_replies, channel_id, thread_ts, start_ts, end_ts
+                )
+                for thread_ts in thread_timestamps
+            }
+            for thread_ts, future in futures.items():
+                try:
+                    replies_by_thread[thread_ts] = future.result()
+                except Exception as e:
+                    logger.error(f"Error fetching thread replies for {thread_ts}: {e}")
+                    replies_by_thread[thread_ts] = []
+
+        return replies_by_thread
 
     def get_thread_replies(
         self, channel_id: str, thread_ts: str, start_ts: float, end_ts: float
-    ) -> List[Dict]:
+    ) -> List[Message]:
         """Fetch replies in a thread within the time window."""
         try:
-            response = self.client.conversations_replies(
+            pages = self._paginate(
+                self.client.conversations_replies,
+                "messages",
                 channel=channel_id,
                 ts=thread_ts,
                 oldest=str(start_ts),
                 latest=str(end_ts),
-                limit=1000,
             )
-
-            if response["ok"]:
-                thread_messages = response["messages"][1:]  # Exclude parent message
-                logger.info(
-                    f"Retrieved {len(thread_messages)} replies from thread {thread_ts}"
-                )
-                return [
-                    self._process_message_content(msg, channel_id)
-                    for msg in thread_messages
-                ]
-
-            return []
+            raw_replies = [
+                msg
+                for thread_messages in pages
+                for msg in thread_messages
+                if msg.get("ts") != thread_ts  # Exclude parent message
+            ]
+            self.user_map.resolve(msg.get("user") for msg in raw_replies)
+            replies = [
+                self._process_message_content(msg, channel_id) for msg in raw_replies
+            ]
+            logger.info(f"Retrieved {len(replies)} replies from thread {thread_ts}")
+            return replies
 
         except SlackApiError as e:
             logger.error(f"Error fetching thread replies: {e}")
             return []
 
-    def _process_message_content(self, message: Dict, channel_id: str) -> Dict:
-        """Process a message to extract text, files, links, and generate message URLs."""
-        user_id = message.get("user", "")
-        username = self.user_map.get(user_id, "Unknown User")
-        timestamp = message.get("ts", "")
-        message_url = self._generate_message_url(channel_id, timestamp)
-
-        processed = {
-            "text": message.get("text", ""),
-            "files": message.get("files", []),
-            "links": [],
-            "timestamp": timestamp,
-            "user": username,
-            "user_id": user_id,
-            "thread_ts": message.get("thread_ts", ""),
-            "message_url": message_url,
-        }
-
-        return processed
+    def _process_message_content(self, message: Dict, channel_id: str) -> Message:
+        """Reduce a raw Slack message to the compact record the summarizer uses."""
+        username = self.user_map.get(message.get("user", ""), "Unknown User")
+        return Message.from_slack(message, channel_id, username)
 
     def _generate_message_url(self, channel_id: str, timestamp: str) -> str:
         """Generate a direct URL to a Slack message."""
-        base_url = "https://yourworkspace.slack.com/archives"
-        # Replace 'yourworkspace' with your actual Slack workspace domain
-
-        ts_formatted = timestamp.replace(".", "")
-        message_url = f"{base_url}/{channel_id}/p{ts_formatted}"
-        return message_url
-
-    def send_message_to_channel(self, channel_name: str, message: str) -> None:
-        """Send a message to a specific channel."""
+        return message_url(channel_id, timestamp)
+
+    @timed("slack.send_message")
+    def send_message_to_channel(
+        self, channel_name: str, message: str
+    ) -> Optional[Tuple[str, str]]:
+        """Send a message to a specific channel and wait until it is posted.
+
+        The message goes through the outbound dispatcher, so long messages are
+        split into threaded continuations and posting is paced. Returns the
+        channel ID and `ts` of the first post, which `update_message` needs,
+        or None if it could not be sent.
+        """
+        return self.outbound.send(channel_name, message)
+
+    @timed("slack.update_message")
+    def update_message(self, channel_id: str, ts: str, message: str) -> bool:
+        """Replace the text of a message posted by `send_message_to_channel`."""
         try:
-            # First, find the channel ID
-            result = self.client.conversations_list(types="public_channel")
-            if not result["ok"]:
-                logger.error(f"Error fetching channel list: {result['error']}")
-                return
-
-            channel_id = None
-            for channel in result["channels"]:
-                if channel["name"] == channel_name:
-                    channel_id = channel["id"]
-                    break
-
-            if not channel_id:
-                logger.error(f"Channel {channel_name} not found")
-                return
-
-            # Send the message
-            response = self.client.chat_postMessage(channel=channel_id, text=message)
-
+            response = self.client.chat_update(channel=channel_id, ts=ts, text=message)
             if not response["ok"]:
-                logger.error(f"Error sending message: {response['error']}")
-
+                logger.error(f"Error updating message: {response['error']}")
+            return response["ok"]
         except SlackApiError as e:
-            logger.error(f"Error sending message to channel: {e}")
+            logger.error(f"Error updating message in channel: {e}")
+            return False
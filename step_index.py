@@ -0,0 +1,109 @@
+import logging
+import math
+import re
+from collections import Counter
+from typing import Dict, List
+
+from config import NOTION_STEP_TOP_K
+from notion_fetcher import format_step
+from tokens import estimate_tokens
+
+logger = logging.getLogger(__name__)
+
+TOKEN_PATTERN = re.compile(r"[a-z0-9]+")
+NEXT_STEPS_HEADER = re.compile(r"^\*?Next Steps:\*?\s*$", re.MULTILINE)
+# Slack links, @mentions and the bullet's field labels carry no step meaning
+BULLET_NOISE = re.compile(r"<[^>]*>|@\S+|Assigned to:|Related to:")
+
+
+def tokenize(text: str) -> List[str]:
+    return TOKEN_PATTERN.findall(text.lower())
+
+
+def extract_next_steps(summary: str) -> List[str]:
+    """Return the bullet lines of the summary's Next Steps section."""
+    match = NEXT_STEPS_HEADER.search(summary)
+    if not match:
+        return []
+    bullets = []
+    for line in summary[match.end() :].lstrip("\n").split("\n"):
+        if not line.strip():
+            break
+        if line.lstrip().startswith("-"):
+            bullets.append(line.strip())
+    return bullets
+
+
+class StepIndex:
+    """BM25 index over Notion steps used to shrink the linking prompt.
+
+    Each step is indexed on its formatted text (name, processes and SOPs),
+    with the step name counted twice so that title matches rank first.
+    """
+
+    def __init__(self, steps: List[Dict], k1: float = 1.5, b: float = 0.75):
+        self.steps = steps
+        self.k1 = k1
+        self.b = b
+        self.texts = [format_step(step) for step in steps]
+        self.term_counts = [
+            Counter(tokenize(step["name"]) + tokenize(text))
+            for step, text in zip(steps, self.texts)
+        ]
+        self.doc_lengths = [sum(counts.values()) for counts in self.term_counts]
+        self.avg_length = sum(self.doc_lengths) / len(steps) if steps else 0
+        document_frequency = Counter(
+            term for counts in self.term_counts for term in counts
+        )
+        self.idf = {
+            term: math.log(1 + (len(steps) - df + 0.5) / (df + 0.5))
+            for term, df in document_frequency.items()
+        }
+
+    def full_text(self) -> str:
+        return "\n".join(self.texts)
+
+    def search(self, query: str, k: int) -> List[int]:
+        """Return the indices of the `k` best matching steps, best first."""
+        terms = [term for term in set(tokenize(query)) if term in self.idf]
+        scores = []
+        for i, counts in enumerate(self.term_counts):
+            score = 0.0
+            norm = self.k1 * (
+                1 - self.b + self.b * self.doc_lengths[i] / self.avg_length
+            )
+            for term in terms:
+                tf = counts.get(term, 0)
+                if tf:
+                    score += self.idf[term] * tf * (self.k1 + 1) / (tf + norm)
+            if score > 0:
+                scores.append((score, i))
+        scores.sort(key=lambda item: (-item[0], item[1]))
+        return [i for _, i in scores[:k]]
+
+    def candidates_for_summary(self, summary: str, k: int = NOTION_STEP_TOP_K) -> str:
+        """Return the text of the top-`k` steps for each Next Steps bullet.
+
+        Candidates are merged across bullets and kept in their original
+        order. With `k` <= 0, or nothing to match, every step is returned.
+        """
+        full_text = self.full_text()
+        bullets = extract_next_steps(summary)
+        if k <= 0 or not bullets:
+            return full_text
+
+        selected = set()
+        for bullet in bullets:
+            selected.update(self.search(BULLET_NOISE.sub(" ", bullet), k))
+        if not selected:
+            return full_text
+        text = "\n".join(self.texts[i] for i in sorted(selected))
+
+        full_tokens = estimate_tokens(full_text)
+        selected_tokens = estimate_tokens(text)
+        logger.info(
+            f"Selected {len(selected)} of {len(self.steps)} Notion steps for "
+            f"{len(bullets)} next steps: ~{selected_tokens} of ~{full_tokens} "
+            f"prompt tokens (~{full_tokens - selected_tokens} saved)"
+        )
+        return text
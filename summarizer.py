@@ -1,111 +1,388 @@
-from openai import OpenAI
-from typing import List, Dict
+from concurrent.futures import ThreadPoolExecutor
+from types import SimpleNamespace
+from typing import Callable, List, Dict, Mapping, Optional
 import logging
-from config import OPENAI_API_KEY, MAX_CHUNK_SIZE, EST
-from prompt import get_sales_summary_prompt, link_next_steps_to_notion_steps_prompt
+from config import (
+    MAX_CHUNK_SIZE,
+    EST,
+    MAX_PROMPT_TOKENS,
+    SUMMARY_CHUNK_WORKERS,
+    LLM_CACHE_BYPASS,
+    COMPACT_PROMPTS,
+)
+import clients
+from llm_cache import LLMResponseCache
+from models import Message
+from chunking import chunk_text
+from prompt_refs import INSTRUCTIONS as REFS_INSTRUCTIONS, PromptRefs
+from instrumentation import InstrumentedClient, metrics, timed
+from prompt import (
+    get_sales_summary_prompt,
+    link_next_steps_to_notion_steps_prompt,
+    merge_sales_summaries_prompt,
+)
+from tokens import estimate_tokens
 from datetime import datetime
+from functools import lru_cache
 import re
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-client = OpenAI(api_key=OPENAI_API_KEY)
+# User mentions, channel tags, special tokens and bare @U mentions, in one pass
+CLEAN_TEXT_PATTERN = re.compile(
+    r"<@(U[A-Z0-9]+)>|<#C[A-Z0-9]+\|([^>]+)>|<![a-zA-Z]+>|@(U[A-Z0-9]+)"
+)
+
+
+@lru_cache(maxsize=4096)
+def _format_minute(minute: int) -> str:
+    return datetime.fromtimestamp(minute * 60, EST).strftime("%m/%d/%Y %H:%M")
+
+
+def format_timestamp(timestamp: str) -> str:
+    """Format a Slack ts as MM/DD/YYYY HH:MM in EST, cached per minute."""
+    return _format_minute(int(float(timestamp) // 60))
+
+
+# A top-level message line in _prepare_conversation output
+MESSAGE_LINE = re.compile(r"^\[\d{2}/\d{2}/\d{4} \d{2}:\d{2}\] ")
+
+# The window dates in an "Executive Summary (start - end)" header. They move
+# with every run, so they are left out of LLM cache keys and cached replies.
+WINDOW_DATES = re.compile(
+    r"(?<=Executive Summary \()\d{2}/\d{2} \d{2}:\d{2} - \d{2}/\d{2} \d{2}:\d{2}(?=\))"
+)
+WINDOW_PLACEHOLDER = "START_DATE - END_DATE"
 
 
 class ConversationSummarizer:
-    def __init__(self, user_map: Dict[str, str]):
+    def __init__(
+        self,
+        user_map: Mapping[str, str],
+        llm_cache: Optional[LLMResponseCache] = None,
+        bypass_cache: bool = LLM_CACHE_BYPASS,
+        compact_prompts: bool = COMPACT_PROMPTS,
+        client=None,
+    ):
         self.model = "o1-mini"
+        self._client = InstrumentedClient(client, "openai") if client else None
         self.user_map = user_map
+        self.llm_cache = llm_cache or LLMResponseCache()
+        self.bypass_cache = bypass_cache
+        self.compact_prompts = compact_prompts
+        self._mentions: Dict[str, str] = {}
+
+    @property
+    def client(self):
+        """The OpenAI client, built on first use so cached runs never import it."""
+        if self._client is None:
+            self._client = InstrumentedClient(clients.openai_client(), "openai")
+        return self._client
 
     def _clean_text(self, text: str) -> str:
-        """Clean text while preserving @mentions."""
-        # Replace <@U12345> format with just the @ mention
-        text = re.sub(r"<@(U[A-Z0-9]+)>", r"@\1", text)
+        """Clean text while preserving @mentions.
 
-        # Remove channel tags
-        text = re.sub(r"<#C[A-Z0-9]+\|([^>]+)>", r"#\1", text)
+        User mentions (<@U12345> or @U12345) become @username, channel tags
+        become #channel and special tokens such as <!here> are removed, all in
+        a single regex pass.
+        """
+        return CLEAN_TEXT_PATTERN.sub(self._replace_token, text).strip()
 
-        # Remove special tokens
-        text = re.sub(r"<![a-zA-Z]+>", "", text)
+    def _replace_token(self, match: re.Match) -> str:
+        user_id = match.group(1) or match.group(3)
+        if user_id:
+            return self._mention(user_id)
+        channel_name = match.group(2)
+        if channel_name:
+            return f"#{channel_name}"
+        return ""  # Special token
 
-        # Replace user IDs with usernames using the user_map
-        for user_id in re.findall(r"@(U[A-Z0-9]+)", text):
-            if user_id in self.user_map:
-                text = text.replace(f"@{user_id}", f"@{self.user_map[user_id]}")
+    def _mention(self, user_id: str) -> str:
+        """Return the @mention for a user ID, memoized for the summarizer's lifetime."""
+        mention = self._mentions.get(user_id)
+        if mention is None:
+            name = self.user_map.get(user_id)
+            mention = f"@{name}" if name is not None else f"@{user_id}"
+            self._mentions[user_id] = mention
+        return mention
 
-        return text.strip()
+    def _resolve_mentions(self, messages: List[Message]) -> None:
+        """Look up every mentioned user in one batch before formatting.
 
-    def _prepare_conversation(self, messages: List[Dict]) -> str:
+        Only user maps that resolve lazily, like `UserDirectory`, need this.
+        """
+        if not hasattr(self.user_map, "resolve"):
+            return
+        texts = [msg.text for msg in messages] + [
+            reply.text for msg in messages for reply in msg.thread_replies
+        ]
+        self.user_map.resolve(
+            user_id
+            for text in texts
+            for user_id in re.findall(r"<@(U[A-Z0-9]+)>", text)
+        )
+
+    @timed("prepare_conversation")
+    def _prepare_conversation(self, messages: List[Message]) -> str:
         """Format conversation for the AI model."""
+        self._resolve_mentions(messages)
         formatted_msgs = []
         for msg in messages:
-            user = msg.get("user", "Unknown User")
-            text = self._clean_text(msg.get("text", ""))
-            timestamp = msg.get("timestamp", "")
-            timestamp_dt = datetime.fromtimestamp(float(timestamp), EST)
-            timestamp_str = timestamp_dt.strftime("%m/%d/%Y %H:%M")
-            message_url = msg.get("message_url", "")
-            thread_replies = msg.get("thread_replies", [])
-            files = msg.get("files", [])
-            links = msg.get("links", [])
+            text = self._clean_text(msg.text)
+            timestamp_str = format_timestamp(msg.timestamp)
 
             # Format main message
             if text:
-                formatted_msg = f"[{timestamp_str}] **{user}**: {text}"
-                if message_url:
-                    formatted_msg += f" [Message URL]: {message_url}"
-                formatted_msgs.append(formatted_msg)
+                formatted_msgs.append(
+                    f"[{timestamp_str}] **{msg.user}**: {text} "
+                    f"[Message URL]: {msg.message_url}"
+                )
 
             # Include shared files
-            for file in files:
-                if isinstance(file, dict):
-                    file_name = file.get("name", "Unnamed file")
-                    file_url = file.get("url_private", "No URL")
-                    formatted_msgs.append(
-                        f"[File shared] {file_name} - [Link]({file_url})"
-                    )
-
-            # Include shared links
-            for link in links:
-                if isinstance(link, dict):
-                    link_url = link.get("url", "No URL")
-                    formatted_msgs.append(f"[Link shared] {link_url}")
+            for file in msg.files:
+                formatted_msgs.append(
+                    f"[File shared] {file.name} - [Link]({file.url_private})"
+                )
 
             # Format thread replies
-            if thread_replies:
+            if msg.thread_replies:
                 formatted_msgs.append("[Thread started]")
-                for reply in thread_replies:
-                    reply_user = reply.get("user", "Unknown User")
-                    reply_text = self._clean_text(reply.get("text", ""))
-                    reply_timestamp = reply.get("timestamp", "")
-                    reply_timestamp_dt = datetime.fromtimestamp(
-                        float(reply_timestamp), EST
-                    )
-                    reply_timestamp_str = reply_timestamp_dt.strftime("%m/%d/%Y %H:%M")
-                    reply_message_url = reply.get("message_url", "")
+                for reply in msg.thread_replies:
+                    reply_text = self._clean_text(reply.text)
+                    reply_timestamp_str = format_timestamp(reply.timestamp)
 
                     if reply_text:
-                        formatted_reply = f"    [{reply_timestamp_str}] **{reply_user}** (reply): {reply_text}"
-                        if reply_message_url:
-                            formatted_reply += f" [Message URL]: {reply_message_url}"
-                        formatted_msgs.append(formatted_reply)
+                        formatted_msgs.append(
+                            f"    [{reply_timestamp_str}] **{reply.user}** (reply): "
+                            f"{reply_text} [Message URL]: {reply.message_url}"
+                        )
                 formatted_msgs.append("[End of thread]")
 
         return "\n\n".join(formatted_msgs)
 
+    def _complete(
+        self, prompt: str, on_progress: Optional[Callable[[str], None]] = None
+    ) -> str:
+        """Send a single-message prompt to the model and return its reply.
+
+        Replies are served from the LLM response cache unless `bypass_cache`
+        is set; fresh replies are always written back to it. With
+        `on_progress`, the reply is streamed and the callback receives the
+        text generated so far after every chunk.
+
+        The window dates of summary headers are replaced by a placeholder in
+        the cache key and the cached reply, so a re-run over the same messages
+        hits the cache; a cached reply gets the current prompt's dates back.
+        """
+        messages = [{"role": "user", "content": prompt}]
+        window = WINDOW_DATES.search(prompt)
+        key = self.llm_cache.key(
+            self.model,
+            [{"role": "user", "content": WINDOW_DATES.sub(WINDOW_PLACEHOLDER, prompt)}],
+        )
+        if not self.bypass_cache:
+            cached = self.llm_cache.get(key)
+            if cached is not None:
+                logger.info("Using cached model reply")
+                metrics.increment("llm_cache.hits")
+                if window:
+                    cached = cached.replace(
+                        f"Executive Summary ({WINDOW_PLACEHOLDER})",
+                        f"Executive Summary ({window.group()})",
+                    )
+                if on_progress:
+                    on_progress(cached)
+                return cached
+
+        metrics.increment("llm_cache.misses")
+        if on_progress:
+            content = self._stream(prompt, messages, on_progress).strip()
+        else:
+            response = self.client.chat.completions.create(
+                model=self.model, messages=messages
+            )
+            metrics.record_usage(self.model, response.usage)
+            content = response.choices[0].message.content.strip()
+        self.llm_cache.put(key, WINDOW_DATES.sub(WINDOW_PLACEHOLDER, content))
+        return content
+
+    def _stream(
+        self, prompt: str, messages: List[Dict], on_progress: Callable[[str], None]
+    ) -> str:
+        """Stream a completion, reporting the accumulated text after each chunk."""
+        stream = self.client.chat.completions.create(
+            model=self.model, messages=messages, stream=True
+        )
+        content = ""
+        for chunk in stream:
+            if not chunk.choices:
+                continue
+            delta = chunk.choices[0].delta.content
+            if delta:
+                content += delta
+                on_progress(content)
+
+        # Streamed responses carry no usage, so record an estimate
+        prompt_tokens = estimate_tokens(prompt)
+        completion_tokens = estimate_tokens(content)
+        metrics.record_usage(
+            self.model,
+            SimpleNamespace(
+                prompt_tokens=prompt_tokens,
+                completion_tokens=completion_tokens,
+                total_tokens=prompt_tokens + completion_tokens,
+            ),
+        )
+        return content
+
+    def _conversation_units(self, conversation: str) -> List[str]:
+        """Split a prepared conversation into messages with their files and threads.
+
+        Units never break inside a thread, so every chunk keeps replies
+        together with the message that started them.
+        """
+        units = []
+        in_thread = False
+        for part in conversation.split("\n\n"):
+            if units and (in_thread or not MESSAGE_LINE.match(part)):
+                units[-1] += "\n\n" + part
+            else:
+                units.append(part)
+
+            if part == "[Thread started]":
+                in_thread = True
+            elif part == "[End of thread]":
+                in_thread = False
+        return units
+
+    def _pack(self, pieces: List[str], max_tokens: int) -> List[List[str]]:
+        """Greedily group consecutive pieces into groups of at most `max_tokens`."""
+        groups = []
+        current, current_tokens = [], 0
+        for piece in pieces:
+            piece_tokens = estimate_tokens(piece) + 1
+            if current and current_tokens + piece_tokens > max_tokens:
+                groups.append(current)
+                current, current_tokens = [], 0
+            current.append(piece)
+            current_tokens += piece_tokens
+        if current:
+            groups.append(current)
+        return groups
+
+    def _chunk_conversation(self, conversation: str, max_tokens: int) -> List[str]:
+        """Pack whole conversation units into chunks of at most `max_tokens`.
+
+        A single unit larger than the budget (a very long thread) is split at
+        reply boundaries instead.
+        """
+        pieces = []
+        for unit in self._conversation_units(conversation):
+            if estimate_tokens(unit) <= max_tokens:
+                pieces.append(unit)
+            else:
+                pieces.extend(unit.split("\n\n"))
+        return ["\n\n".join(group) for group in self._pack(pieces, max_tokens)]
+
+    def _complete_all(self, prompts: List[str]) -> List[str]:
+        """Run several prompts in parallel, returning replies in order."""
+        workers = max(1, min(SUMMARY_CHUNK_WORKERS, len(prompts)))
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            return list(executor.map(self._complete, prompts))
+
+    def _merge_summaries(
+        self,
+        summaries: List[str],
+        start_date: str,
+        end_date: str,
+        on_progress: Optional[Callable[[str], None]] = None,
+    ) -> str:
+        """Merge partial summaries, in several rounds if they do not fit at once.
+
+        Only the final merge is streamed to `on_progress`.
+        """
+        prompt = merge_sales_summaries_prompt(summaries, start_date, end_date)
+        if estimate_tokens(prompt) <= MAX_PROMPT_TOKENS:
+            return self._complete(prompt, on_progress)
+
+        overhead = estimate_tokens(
+            merge_sales_summaries_prompt([], start_date, end_date)
+        )
+        groups = self._pack(summaries, MAX_PROMPT_TOKENS - overhead)
+        if len(groups) == len(summaries):
+            # Each summary fills a prompt on its own; merging cannot shrink further
+            return self._complete(prompt, on_progress)
+
+        logger.info(
+            f"Merging {len(summaries)} partial summaries in {len(groups)} groups"
+        )
+        merged = self._complete_all(
+            [
+                merge_sales_summaries_prompt(group, start_date, end_date)
+                for group in groups
+            ]
+        )
+        return self._merge_summaries(merged, start_date, end_date, on_progress)
+
+    @timed("llm.summarize")
     def summarize_conversation(
-        self, conversation: str, start_date: str, end_date: str
+        self,
+        conversation: str,
+        start_date: str,
+        end_date: str,
+        on_progress: Optional[Callable[[str], None]] = None,
     ) -> str:
-        """Summarize the conversation using the OpenAI model."""
-        try:
+        """Summarize the conversation using the OpenAI model.
+
+        Conversations that do not fit in MAX_PROMPT_TOKENS are split at message
+        and thread boundaries, the chunks are summarized in parallel and the
+        partial summaries are merged into a single executive summary. With
+        `on_progress`, the final completion is streamed and the callback gets
+        the Slack-formatted summary so far.
+
+        With `compact_prompts`, URLs are sent as reference IDs and expanded
+        back into links in the replies.
+        """
+        refs = PromptRefs() if self.compact_prompts else None
+        if refs:
+            conversation = refs.compact_conversation(conversation)
+
+        def summary_prompt(conversation):
             prompt = get_sales_summary_prompt(conversation, start_date, end_date)
-            # Replace with your OpenAI API call
-            response = client.chat.completions.create(
-                model=self.model, messages=[{"role": "user", "content": prompt}]
-            )
+            return prompt + REFS_INSTRUCTIONS if refs else prompt
+
+        def expand(text):
+            return refs.expand(text) if refs else text
+
+        def report_progress(text):
+            on_progress(self.format_for_slack(expand(text)))
+
+        progress = report_progress if on_progress else None
+
+        try:
+            prompt = summary_prompt(conversation)
+            if estimate_tokens(prompt) <= MAX_PROMPT_TOKENS:
+                summary = self._complete(prompt, progress)
+            else:
+                overhead = estimate_tokens(summary_prompt(""))
+                chunks = self._chunk_conversation(
+                    conversation, MAX_PROMPT_TOKENS - overhead
+                )
+                logger.info(f"Summarizing conversation in {len(chunks)} chunks")
+                partial_summaries = self._complete_all(
+                    [summary_prompt(chunk) for chunk in chunks]
+                )
+                # Partial summaries are merged with real links, so the merge
+                # prompts need no reference IDs
+                summary = self._merge_summaries(
+                    [expand(partial) for partial in partial_summaries],
+                    start_date,
+                    end_date,
+                    progress,
+                )
 
-            summary = response.choices[0].message.content.strip()
-            formatted_summary = self.format_for_slack(summary)
+            formatted_summary = self.format_for_slack(expand(summary))
             return formatted_summary
         except Exception as e:
             logger.error(f"Error in summarization: {e}")
@@ -121,27 +398,26 @@ class ConversationSummarizer:
 
     def chunk_summary(self, summary: str) -> List[str]:
         """Split summary into chunks of maximum size."""
-        chunks = []
-        current_chunk = ""
-
-        for paragraph in summary.split("\n"):
-            if len(current_chunk) + len(paragraph) + 1 <= MAX_CHUNK_SIZE:
-                current_chunk += paragraph + "\n"
-            else:
-                chunks.append(current_chunk.strip())
-                current_chunk = paragraph + "\n"
-
-        if current_chunk:
-            chunks.append(current_chunk.strip())
-
-        return chunks
+        return chunk_text(summary, MAX_CHUNK_SIZE)
 
+    @timed("llm.link_next_steps")
     def link_next_steps_to_notion_steps(
         self, channel_summary: str, notion_steps: str
     ) -> str:
         """Link the next steps to the notion steps."""
-        prompt = link_next_steps_to_notion_steps_prompt(channel_summary, notion_steps)
-        response = client.chat.completions.create(
-            model=self.model, messages=[{"role": "user", "content": prompt}]
+        if not self.compact_prompts:
+            prompt = link_next_steps_to_notion_steps_prompt(
+                channel_summary, notion_steps
+            )
+            return self._complete(prompt)
+
+        refs = PromptRefs()
+        prompt = link_next_steps_to_notion_steps_prompt(
+            refs.compact_links(channel_summary), refs.compact_steps(notion_steps)
+        )
+        refs.report(
+            "link prompt",
+            link_next_steps_to_notion_steps_prompt(channel_summary, notion_steps),
+            prompt,
         )
-        return response.choices[0].message.content.strip()
+        return refs.expand(self._complete(prompt + REFS_INSTRUCTIONS))
@@ -0,0 +1,27 @@
+from channel_index import ChannelIndex, InMemoryChannelBacking
+
+
+def counting_index(miss_ttl_seconds=600):
+    scans = []
+
+    def list_channels():
+        scans.append(1)
+        yield [{"name": "sales-team", "id": "C0001"}]
+
+    index = ChannelIndex(list_channels, InMemoryChannelBacking(), {}, miss_ttl_seconds)
+    return index, scans
+
+
+def test_missing_name_is_scanned_once():
+    index, scans = counting_index()
+    for _ in range(5):
+        assert index.lookup("sales-teem") is None
+    assert index.lookup("sales-team") == "C0001"
+    assert len(scans) == 1
+
+
+def test_missing_name_is_rescanned_after_ttl():
+    index, scans = counting_index(miss_ttl_seconds=0)
+    index.lookup("sales-teem")
+    index.lookup("sales-teem")
+    assert len(scans) == 2
@@ -0,0 +1,54 @@
+from live_summary import IN_PROGRESS, LiveSummaryMessage
+
+SUMMARY = (
+    "Executive Summary (10/17 09:00 - 10/18 09:00)\n---\n\n"
+    "Strategic Initiatives:\n- Expand into EMEA (Owner: @ana)\n\n"
+    "Next Steps:\n- Send the pricing deck (Assigned to: @bo)\n\n"
+    "Key Links:\n- <https://example.com|Source>"
+)
+
+
+class RecordingFetcher:
+    """Stands in for `SlackDataFetcher` and keeps every `chat.update` text."""
+
+    def __init__(self):
+        self.updates = []
+
+    def send_message_to_channel(self, channel_name, message):
+        return "C000001", "1.000000"
+
+    def update_message(self, channel_id, ts, message):
+        self.updates.append(message)
+        return True
+
+
+def stream(text):
+    fetcher = RecordingFetcher()
+    live = LiveSummaryMessage(fetcher, "summaries", min_interval=0)
+    live.start()
+    for end in range(1, len(text) + 1):
+        live.update(text[:end])
+    return fetcher.updates
+
+
+def test_no_update_before_the_first_section_has_streamed():
+    first_section = SUMMARY[: SUMMARY.index("\n\n")]
+    assert stream(first_section) == []
+
+
+def test_updates_only_show_finished_sections():
+    suffix = f"\n\n{IN_PROGRESS}"
+    updates = stream(SUMMARY)
+    assert updates
+    for update in updates:
+        assert update.endswith(suffix)
+        assert SUMMARY.startswith(update[: -len(suffix)] + "\n\n")
+
+
+def test_finish_shows_the_final_text():
+    fetcher = RecordingFetcher()
+    live = LiveSummaryMessage(fetcher, "summaries", min_interval=0)
+    live.start()
+    live.finish(SUMMARY)
+    assert fetcher.updates[-1] == SUMMARY
+    assert live.finished
@@ -0,0 +1,9 @@
+import math
+
+# Rough average for English text with OpenAI tokenizers
+CHARS_PER_TOKEN = 4
+
+
+def estimate_tokens(text: str) -> int:
+    """Estimate the number of model tokens in `text`."""
+    return math.ceil(len(text) / CHARS_PER_TOKEN)
@@ -0,0 +1,109 @@
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Iterable, Optional
+
+from slack_sdk.errors import SlackApiError
+
+from cache_utils import load_json, save_json
+from config import USER_CACHE_PATH, USER_CACHE_TTL_HOURS, USER_LOOKUP_WORKERS
+
+logger = logging.getLogger(__name__)
+
+# users.info errors meaning the ID will not resolve; other errors (rate
+# limits, server or auth errors) are temporary and the ID is retried
+NOT_FOUND_ERRORS = {"user_not_found", "user_not_visible"}
+
+# Returned by `_fetch_name` for lookups that failed temporarily
+_LOOKUP_FAILED = object()
+
+
+class UserDirectory:
+    """Lazily resolved, disk-cached mapping of Slack user IDs to display names.
+
+    Nothing is fetched up front. IDs that are missing from the cache, or whose
+    entry is older than the TTL, are looked up with `users.info` the first
+    time they are needed and written back to the cache file. `resolve` looks
+    up a batch of IDs concurrently, so callers can warm the directory for a
+    whole page of messages at once.
+    """
+
+    def __init__(
+        self,
+        client,
+        path: Optional[str] = USER_CACHE_PATH,
+        ttl_seconds: float = USER_CACHE_TTL_HOURS * 3600,
+        max_workers: int = USER_LOOKUP_WORKERS,
+    ):
+        self.client = client
+        self.path = path
+        self.ttl_seconds = ttl_seconds
+        self.max_workers = max(1, max_workers)
+        self._lock = threading.Lock()
+        self._users: Dict[str, Dict] = load_json(path, {}) if path else {}
+
+    def _is_fresh(self, user_id: str) -> bool:
+        entry = self._users.get(user_id)
+        return bool(entry) and time.time() - entry["fetched_at"] < self.ttl_seconds
+
+    def _fetch_name(self, user_id: str):
+        """Look up a single user's display name via users.info.
+
+        Returns None for IDs Slack cannot resolve and `_LOOKUP_FAILED` when
+        the lookup failed for another reason.
+        """
+        try:
+            response = self.client.users_info(user=user_id)
+        except SlackApiError as e:
+            logger.error(f"Error fetching user info for {user_id}: {e}")
+            if e.response.get("error") in NOT_FOUND_ERRORS:
+                return None
+            return _LOOKUP_FAILED
+        profile = response["user"].get("profile", {})
+        return profile.get("display_name") or profile.get("real_name", "Unknown User")
+
+    def resolve(self, user_ids: Iterable[str]) -> None:
+        """Fetch any unknown or expired user IDs in one concurrent batch."""
+        user_ids = {uid for uid in user_ids if uid}
+        if all(self._is_fresh(uid) for uid in user_ids):
+            return
+
+        # Serialize batches so concurrent callers never look up the same ID twice
+        with self._lock:
+            missing = [uid for uid in user_ids if not self._is_fresh(uid)]
+            if not missing:
+                return
+
+            workers = min(self.max_workers, len(missing))
+            with ThreadPoolExecutor(max_workers=workers) as executor:
+                names = dict(zip(missing, executor.map(self._fetch_name, missing)))
+
+            now = time.time()
+            for user_id, name in names.items():
+                # Failed lookups are not cached, so the next call retries them
+                # (and a stale entry keeps being used until then)
+                if name is _LOOKUP_FAILED:
+                    continue
+                # Unresolvable IDs (bots, deleted users) are cached too so they
+                # are not looked up again until the TTL expires
+                self._users[user_id] = {"name": name, "fetched_at": now}
+            if self.path:
+                save_json(self.path, self._users)
+        logger.info(f"Resolved {len(missing)} Slack users")
+
+    def get(self, user_id: str, default: Optional[str] = None) -> Optional[str]:
+        self.resolve([user_id])
+        entry = self._users.get(user_id)
+        if entry and entry["name"]:
+            return entry["name"]
+        return default
+
+    def __contains__(self, user_id: str) -> bool:
+        return self.get(user_id) is not None
+
+    def __getitem__(self, user_id: str) -> str:
+        name = self.get(user_id)
+        if name is None:
+            raise KeyError(user_id)
+        return name